@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+
+import argparse
+import itertools as it
+import multiprocessing as mp
+import sys
+import time
+
+import main
+
+# Number of puzzles handed to the worker pool at a time, bounds the
+# number of puzzles and solutions held in memory
+BLOCK_SIZE = 10000
+
+# Report the throughput every REPORT_EVERY puzzles
+REPORT_EVERY = 100000
+
+# Line written for a puzzle whose time limit ran out before it was
+# solved, a puzzle without a solution gets an empty line
+UNKNOWN = '?'
+
+# The empty board template, solver backend and time limit per puzzle
+# of the current process
+_template = None
+_backend = 'csp'
+_max_time = None
+
+
+def _init_worker(template_path=None, backend='csp', max_time=None):
+    global _template, _backend, _max_time
+    _template = main.get_sudoku_template(path=template_path)
+    _backend = backend
+    _max_time = max_time
+
+
+def read_puzzles(stream):
+    """
+    Lazily read puzzles from 'stream', one 81 character line per puzzle
+    where '0' or '.' marks an empty cell. Blank lines are skipped.
+    """
+    for line in stream:
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        if len(line) != 81:
+            raise ValueError('Expected 81 cells, got %r' % line)
+        yield line.replace('.', '0')
+
+
+def solve_puzzle(puzzle):
+    """
+    Solve one puzzle line with the template of the current process.
+    Returns the solution as an 81 character line, an empty string if
+    the puzzle has no solution or UNKNOWN if the time limit ran out.
+    """
+    board = [puzzle[row * 9:(row + 1) * 9] for row in range(9)]
+    if _backend == 'dlx':
+        solver = main.SudokuExactCover(board, main.sudoku_symbols(9))
+    else:
+        solver = main.sudoku_from_template(_template, board)
+    result = solver.solve(main.SearchBudget(max_time=_max_time))
+    if result.status == 'unknown':
+        return UNKNOWN
+    solution = result.solution
+    if solution is None:
+        return ''
+    return ''.join(solution['%d-%d' % (row, col)][0]
+                   for row in range(9) for col in range(9))
+
+
+def solve_stream(puzzles, output, processes=1, report=sys.stderr,
+                 template_path=None, backend='csp', max_time=None):
+    """
+    Solve the puzzles of the iterable 'puzzles', writing the solutions
+    in the same order to the stream 'output'. With more than one
+    process the puzzles are solved by a worker pool. The throughput is
+    written to 'report' as the puzzles are solved. 'template_path' is
+    an optional on disk cache of the compiled board template,
+    'backend' one of main.SUDOKU_BACKENDS and 'max_time' an optional
+    time limit in seconds per puzzle. Returns the number of puzzles
+    solved.
+    """
+    # Compile or load the template once up front, so the workers can
+    # load it from disk instead of compiling it again
+    _init_worker(template_path, backend, max_time)
+    pool = None
+    if processes > 1:
+        pool = mp.Pool(processes, _init_worker,
+                       (template_path, backend, max_time))
+
+    count = 0
+    start = time.time()
+    try:
+        while True:
+            block = list(it.islice(puzzles, BLOCK_SIZE))
+            if len(block) == 0:
+                break
+
+            if pool is None:
+                solutions = map(solve_puzzle, block)
+            else:
+                chunksize = max(1, len(block) // (4 * processes))
+                solutions = pool.imap(solve_puzzle, block, chunksize)
+
+            for solution in solutions:
+                output.write(solution + '\n')
+                count += 1
+                if count % REPORT_EVERY == 0:
+                    print_throughput(count, time.time() - start, report)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    print_throughput(count, time.time() - start, report)
+    return count
+
+
+def print_throughput(count, elapsed, report):
+    """
+    Write the number of solved puzzles and puzzles/sec to 'report'.
+    """
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print('Solved {} puzzles in {:.2f}s ({:.1f} puzzles/sec)'.format(
+        count, elapsed, rate), file=report)
+
+
+def main_batch():
+    parser = argparse.ArgumentParser(
+        description='Solve Sudoku puzzles, one 81 character line each')
+    parser.add_argument('input', help="puzzle file, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-',
+                        help="solution file, '-' for stdout")
+    parser.add_argument('-j', '--processes', type=int,
+                        default=mp.cpu_count(),
+                        help='number of worker processes')
+    parser.add_argument('-t', '--template',
+                        help='file caching the compiled board template')
+    parser.add_argument('-b', '--backend', default='csp',
+                        choices=main.SUDOKU_BACKENDS,
+                        help='solver backend')
+    parser.add_argument('-T', '--max-time', type=float,
+                        help="time limit in seconds per puzzle, puzzles "
+                        "running out of time get a '?' line")
+    args = parser.parse_args()
+
+    infile = sys.stdin if args.input == '-' else open(args.input, 'r')
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    with infile, outfile:
+        solve_stream(read_puzzles(infile), outfile, args.processes,
+                     template_path=args.template, backend=args.backend,
+                     max_time=args.max_time)
+
+
+if __name__ == '__main__':
+    main_batch()
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import main
+
+# Solver configurations, by name. 'model' is one of
+# main.SUDOKU_BACKENDS, the other keys are passed to CSP.solve()
+CONFIGURATIONS = {
+    'csp-mrv': {'model': 'csp'},
+    'csp-mrv-degree': {'model': 'csp', 'variable_heuristic': 'mrv-degree'},
+    'csp-dom/wdeg': {'model': 'csp', 'variable_heuristic': 'dom/wdeg'},
+    'csp-mrv-lcv': {'model': 'csp', 'value_heuristic': 'lcv'},
+    'csp-backjumping': {'model': 'csp', 'search': 'backjumping'},
+    'csp-sat-direct': {'model': 'csp', 'backend': 'sat'},
+    'csp-sat-support': {'model': 'csp', 'backend': 'sat',
+                        'encoding': 'support'},
+    'dlx': {'model': 'dlx'},
+}
+
+# Name of the map coloring problem in the results
+MAP_COLORING = 'map-coloring'
+
+# A run is flagged as a regression when its wall time exceeds the
+# baseline by more than TIME_TOLERANCE of the baseline time, 0.25 being
+# 25% slower, and by more than TIME_SLACK seconds, or when it needs
+# more backtracks
+TIME_TOLERANCE = 0.25
+TIME_SLACK = 0.005
+
+
+def build(problem, model):
+    """
+    Build the solver for 'problem', a puzzle file or MAP_COLORING.
+    """
+    if problem == MAP_COLORING:
+        return main.create_map_coloring_csp()
+    return main.create_sudoku_solver(problem, model)
+
+
+def solve(solver, config, max_time):
+    """
+    Solve with the given configuration. Returns the status and the
+    number of backtracks.
+    """
+    if config['model'] == 'dlx':
+        result = solver.solve(main.SearchBudget(max_time=max_time))
+        return result.status, result.num_backtrack
+
+    options = {k: v for k, v in config.items() if k != 'model'}
+    result = solver.solve(main.SearchBudget(max_time=max_time), **options)
+    return result.status, result.num_backtrack
+
+
+def run(problem, config, repeat=1, max_time=None, memory=True):
+    """
+    Benchmark one problem under one configuration. The times are the
+    best of 'repeat' runs. The peak memory is measured with tracemalloc
+    in an extra run, to keep its overhead out of the timings.
+    """
+    build_time = solve_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        solver = build(problem, config['model'])
+        built = time.perf_counter()
+        status, backtracks = solve(solver, config, max_time)
+        done = time.perf_counter()
+        build_time = min(build_time, built - start)
+        solve_time = min(solve_time, done - built)
+
+    record = {'status': status,
+              'backtracks': backtracks,
+              'build_time': build_time,
+              'solve_time': solve_time,
+              'wall_time': build_time + solve_time}
+
+    if memory:
+        tracemalloc.start()
+        solve(build(problem, config['model']), config, max_time)
+        record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return record
+
+
+def run_all(problems, configs, repeat=1, max_time=None, memory=True,
+            report=sys.stdout):
+    """
+    Benchmark every problem under every configuration. Returns the
+    results as results[config][problem] = record.
+    """
+    results = {}
+    for name in configs:
+        config = CONFIGURATIONS[name]
+        results[name] = {}
+        for problem in problems:
+            if problem == MAP_COLORING and config['model'] != 'csp':
+                continue
+            record = run(problem, config, repeat, max_time, memory)
+            results[name][problem] = record
+            print('{:<16} {:<32} {:>13} {:>8} {:>9.4f}s'.format(
+                name, os.path.basename(problem), record['status'],
+                record['backtracks'], record['wall_time']), file=report)
+    return results
+
+
+def compare(results, baseline, tolerance=TIME_TOLERANCE):
+    """
+    Compare the results with the baseline results. Returns a list of
+    messages describing the regressions.
+    """
+    regressions = []
+    for name, problems in results.items():
+        for problem, record in problems.items():
+            base = baseline.get(name, {}).get(problem)
+            if base is None:
+                continue
+            what = '{} {}'.format(name, problem)
+            if record['status'] != base['status']:
+                regressions.append('{}: status {} -> {}'.format(
+                    what, base['status'], record['status']))
+            if record['backtracks'] > base['backtracks']:
+                regressions.append('{}: backtracks {} -> {}'.format(
+                    what, base['backtracks'], record['backtracks']))
+            slower = record['wall_time'] - base['wall_time']
+            if slower > max(base['wall_time'] * tolerance, TIME_SLACK):
+                regressions.append('{}: wall time {:.4f}s -> {:.4f}s'.format(
+                    what, base['wall_time'], record['wall_time']))
+    return regressions
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the con_sat solvers')
+    parser.add_argument('puzzles', nargs='*',
+                        help='extra puzzle files to benchmark')
+    parser.add_argument('-c', '--config', action='append',
+                        choices=sorted(CONFIGURATIONS),
+                        help='configuration to run, default all')
+    parser.add_argument('-o', '--output', default='bench_results.json',
+                        help='JSON file to write the results to')
+    parser.add_argument('-b', '--baseline',
+                        help='JSON results to compare against')
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='runs per benchmark, the best time is kept')
+    parser.add_argument('-T', '--max-time', type=float,
+                        help='time limit in seconds per run')
+    parser.add_argument('--tolerance', type=float, default=TIME_TOLERANCE,
+                        help='allowed relative slowdown')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the peak memory runs')
+    parser.add_argument('--large', action='store_true',
+                        help='also run the 16x16 and 25x25 boards')
+    args = parser.parse_args()
+
+    boards = main.Boards + main.Hard_boards
+    if args.large:
+        boards += main.Large_boards
+    problems = ['boards/' + board for board in boards]
+    problems += args.puzzles
+    problems.append(MAP_COLORING)
+
+    results = run_all(problems, args.config or list(CONFIGURATIONS),
+                      args.repeat, args.max_time, not args.no_memory)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print('REGRESSION', message)
+        if len(regressions) != 0:
+            sys.exit(1)
+        print('No regressions against', args.baseline)
+
+
+if __name__ == '__main__':
+    main_bench()
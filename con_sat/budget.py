@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+
+import os
+import time
+
+
+class BudgetExceeded(Exception):
+
+    """
+    Raised inside the search when a SearchBudget runs out. 'reason' is
+    one of 'nodes', 'time', 'memory' or 'cancelled'.
+    """
+
+    def __init__(self, reason):
+        super(BudgetExceeded, self).__init__(reason)
+        self.reason = reason
+
+
+class SearchBudget(object):
+
+    """
+    Limits on a single search. 'max_nodes' bounds the number of search
+    nodes, 'max_time' the wall time in seconds and 'max_memory' how many
+    bytes the resident memory of the process may grow by during the
+    search. 'cancel' is a cancellation token, any object with an
+    is_set() method such as a threading.Event or multiprocessing.Event,
+    that stops the search once it is set. Time, memory and cancellation
+    are only checked every 'check_every' nodes, to keep the checks
+    cheap.
+    """
+
+    def __init__(self, max_nodes=None, max_time=None, max_memory=None,
+                 cancel=None, check_every=64):
+        if max_memory is not None and current_memory() is None:
+            raise ValueError('Memory budgets are not supported here')
+
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.max_memory = max_memory
+        self.cancel = cancel
+        self.check_every = check_every
+
+        self.nodes = 0
+        self.polls = 0
+        self.start_time = None
+        self.start_memory = None
+
+    def start(self):
+        """
+        Start counting nodes, time and memory from zero.
+        """
+        self.nodes = 0
+        self.polls = 0
+        self.start_time = time.monotonic()
+        if self.max_memory is not None:
+            self.start_memory = current_memory()
+
+    def elapsed(self):
+        """
+        Seconds since start() was called.
+        """
+        return time.monotonic() - self.start_time
+
+    def check(self):
+        """
+        Count a search node, and raise BudgetExceeded if a limit has
+        been reached.
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded('nodes')
+        if self.nodes % self.check_every == 0:
+            self.check_limits()
+
+    def poll(self):
+        """
+        Like check(), but without counting a search node, for long
+        stretches of work between the nodes such as the first
+        propagation.
+        """
+        self.polls += 1
+        if self.polls % self.check_every == 0:
+            self.check_limits()
+
+    def check_limits(self):
+        """
+        Raise BudgetExceeded if the search was cancelled or ran out of
+        time or memory.
+        """
+        if self.cancel is not None and self.cancel.is_set():
+            raise BudgetExceeded('cancelled')
+        if self.max_time is not None and self.elapsed() > self.max_time:
+            raise BudgetExceeded('time')
+        if self.max_memory is not None and \
+                current_memory() - self.start_memory > self.max_memory:
+            raise BudgetExceeded('memory')
+
+
+def current_memory():
+    """
+    The current resident memory of the process in bytes, or None where
+    it can not be measured. Unlike the peak resident memory it goes
+    back down when memory is released, so one large search does not
+    count against the searches after it.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class SearchResult(object):
+
+    """
+    Outcome of CSP.solve(). 'status' is 'solved', 'unsatisfiable' or
+    'unknown' when the budget ran out first, in which case 'reason'
+    tells which limit was hit. The statistics are those of the search
+    up to that point.
+    """
+
+    def __init__(self, status, solution=None, reason=None, nodes=0,
+                 num_backtrack=0, num_backtrack_failed=0, elapsed=0.0):
+        self.status = status
+        self.solution = solution
+        self.reason = reason
+        self.nodes = nodes
+        self.num_backtrack = num_backtrack
+        self.num_backtrack_failed = num_backtrack_failed
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        string = "SearchResult(status={}, reason={}, nodes={}, elapsed={:.3f})"
+        return string.format(self.status, self.reason, self.nodes,
+                             self.elapsed)
@@ -0,0 +1,255 @@
+#!/usr/bin/python3
+
+import math
+
+from budget import BudgetExceeded, SearchBudget, SearchResult
+
+
+class DancingLinks(object):
+
+    """
+    Exact cover solver. Knuth's Algorithm X on dancing links.
+    The nodes of the sparse matrix live in parallel lists, where node 0
+    is the root and nodes 1 to n are the column headers. Every other
+    node is a 1 in the matrix.
+    """
+
+    def __init__(self, num_columns):
+        n = num_columns
+        # Left, right, up and down links, and the column of each node
+        self.L = [n] + list(range(n))
+        self.R = list(range(1, n + 1)) + [0]
+        self.U = list(range(n + 1))
+        self.D = list(range(n + 1))
+        self.C = list(range(n + 1))
+
+        # self.size[c] is the number of nodes in column c
+        self.size = [0] * (n + 1)
+
+        # self.row_of[x] is the index of the row node x belongs to
+        self.row_of = [None] * (n + 1)
+        self.rows = []
+
+        # Columns emptied by cover() since the list was last cleared
+        self.emptied = []
+
+        # The SearchBudget checked at every search node, if any
+        self.budget = None
+
+        # Variables to record the number of backtracks and failed
+        # backtracks, as in CSP
+        self.num_backtrack = 0
+        self.num_backtrack_failed = 0
+
+    def add_row(self, name, columns):
+        """
+        Add a row with 1s in the given columns, numbered from 1.
+        'name' is returned as part of the solution.
+        """
+        first = None
+        for c in columns:
+            x = len(self.C)
+            self.C.append(c)
+            self.row_of.append(len(self.rows))
+
+            # Insert at the bottom of column c
+            self.U.append(self.U[c])
+            self.D.append(c)
+            self.D[self.U[c]] = x
+            self.U[c] = x
+            self.size[c] += 1
+
+            # Insert at the end of the row
+            if first is None:
+                first = x
+                self.L.append(x)
+                self.R.append(x)
+            else:
+                self.L.append(self.L[first])
+                self.R.append(first)
+                self.R[self.L[first]] = x
+                self.L[first] = x
+        self.rows.append(name)
+
+    def cover(self, c):
+        L, R, U, D, C, size = self.L, self.R, self.U, self.D, self.C, self.size
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                size[C[j]] -= 1
+                if size[C[j]] == 0:
+                    self.emptied.append(C[j])
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, C, size = self.L, self.R, self.U, self.D, self.C, self.size
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                size[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def search(self):
+        """
+        Return the names of the rows of an exact cover, or None if
+        there is none.
+        """
+        solution = []
+        self.emptied = [c for c in range(1, len(self.size))
+                        if self.size[c] == 0]
+        if self.backtrack(solution):
+            return [self.rows[self.row_of[x]] for x in solution]
+        return None
+
+    def backtrack(self, solution):
+        """
+        Algorithm X. Extends the partial cover 'solution', a list of
+        nodes, and returns True if a full cover was found.
+        """
+        self.num_backtrack += 1
+        if self.budget is not None:
+            self.budget.check()
+        R, D, C = self.R, self.D, self.C
+
+        if R[0] == 0:
+            return True
+
+        # A column emptied by the last choice can no longer be covered.
+        # Only the choices of the parent node can have emptied a column,
+        # as the parent would have failed otherwise.
+        size, L = self.size, self.L
+        for c in self.emptied:
+            if size[c] == 0 and R[L[c]] == c:
+                self.num_backtrack_failed += 1
+                return False
+
+        # Branch on the column with the fewest 1s. A column with a
+        # single 1 is as good as it gets, now that no column is empty.
+        c = R[0]
+        best = c
+        while c != 0:
+            if size[c] < size[best]:
+                best = c
+                if size[c] <= 1:
+                    break
+            c = R[c]
+        c = best
+
+        self.emptied = []
+        self.cover(c)
+        emptied = self.emptied
+        r = D[c]
+        while r != c:
+            solution.append(r)
+            self.emptied = list(emptied)
+            j = R[r]
+            while j != r:
+                self.cover(C[j])
+                j = R[j]
+
+            if self.backtrack(solution):
+                return True
+
+            solution.pop()
+            j = self.L[r]
+            while j != r:
+                self.uncover(C[j])
+                j = self.L[j]
+            r = D[r]
+        self.uncover(c)
+
+        self.num_backtrack_failed += 1
+        return False
+
+
+class SudokuExactCover(object):
+
+    """
+    Sudoku as an exact cover problem. Every (cell, value) choice is a
+    row, covering one cell column and one column for the value in each
+    of its row, column and box. Offers the same search interface and
+    solution format as the CSP built by create_sudoku_csp().
+    """
+
+    def __init__(self, board, symbols):
+        self.board = board
+        self.symbols = symbols
+        self.num_backtrack = 0
+        self.num_backtrack_failed = 0
+
+        # The SearchBudget of the running search, see solve()
+        self.budget = None
+
+    def backtracking_search(self, verbose=True):
+        """
+        Solve the board, returns the solution as a dictionary of
+        variable names '<row>-<col>' to a list holding the value, or
+        None if the board has no solution.
+        """
+        n = len(self.board)
+        box = math.isqrt(n)
+        dlx = DancingLinks(4 * n * n)
+
+        for row in range(n):
+            for col in range(n):
+                b = (row // box) * box + col // box
+                clue = self.board[row][col]
+                for v, value in enumerate(self.symbols):
+                    if clue != '0' and clue != value:
+                        continue
+                    dlx.add_row(('%d-%d' % (row, col), value),
+                                (1 + row * n + col,
+                                 1 + n * n + row * n + v,
+                                 1 + 2 * n * n + col * n + v,
+                                 1 + 3 * n * n + b * n + v))
+
+        dlx.budget = self.budget
+        try:
+            rows = dlx.search()
+        finally:
+            self.num_backtrack = dlx.num_backtrack
+            self.num_backtrack_failed = dlx.num_backtrack_failed
+        if verbose:
+            print('Num backtrack =', self.num_backtrack)
+            print('Num backtrack failed =', self.num_backtrack_failed)
+
+        if rows is None:
+            return None
+        return {var: [value] for var, value in rows}
+
+    def solve(self, budget=None):
+        """
+        Run backtracking_search() within the limits of the SearchBudget
+        'budget', like CSP.solve(). Returns a SearchResult, whose status
+        is 'unknown' if the budget ran out first.
+        """
+        budget = budget or SearchBudget()
+        budget.start()
+
+        self.budget = budget
+        try:
+            solution = self.backtracking_search(verbose=False)
+            status = 'unsatisfiable' if solution is None else 'solved'
+            reason = None
+        except BudgetExceeded as e:
+            solution = None
+            status = 'unknown'
+            reason = e.reason
+        finally:
+            self.budget = None
+
+        return SearchResult(
+            status, solution, reason, budget.nodes, self.num_backtrack,
+            self.num_backtrack_failed, budget.elapsed())
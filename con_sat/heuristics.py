@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+
+
+class DomainBuckets(object):
+
+    """
+    Incremental priority structure for variable selection.
+    The undecided variables are kept in buckets indexed by the size of
+    their domain, so the variables with the fewest legal values are
+    found without scanning the whole assignment. Every update is
+    recorded on a trail, so that the search can undo the updates made
+    below a node when it backtracks.
+    """
+
+    def __init__(self, assignment):
+        # self.size[i] is the current domain size of variable i
+        self.size = {}
+
+        # self.buckets[n] is the set of undecided variables with n
+        # legal values, dictionaries are used as ordered sets
+        self.buckets = {}
+
+        # self.trail is a list of (variable, previous size) pairs
+        self.trail = []
+
+        for var, domain in assignment.items():
+            self.size[var] = len(domain)
+            if len(domain) > 1:
+                self.buckets.setdefault(len(domain), {})[var] = None
+
+    def __len__(self):
+        return sum(map(len, self.buckets.values()))
+
+    def _move(self, var, old, new):
+        if old > 1:
+            del self.buckets[old][var]
+        if new > 1:
+            self.buckets.setdefault(new, {})[var] = None
+        self.size[var] = new
+
+    def update(self, var, size):
+        """
+        Record that the domain of 'var' now holds 'size' values.
+        """
+        old = self.size[var]
+        if old != size:
+            self.trail.append((var, old))
+            self._move(var, old, size)
+
+    def mark(self):
+        """
+        Return a marker for the current state of the trail.
+        """
+        return len(self.trail)
+
+    def undo(self, mark):
+        """
+        Undo all updates made since 'mark' was taken.
+        """
+        while len(self.trail) > mark:
+            var, old = self.trail.pop()
+            self._move(var, self.size[var], old)
+
+    def smallest(self):
+        """
+        Return the bucket of undecided variables with the fewest legal
+        values, or None if every variable has been decided.
+        """
+        for size in sorted(self.buckets):
+            if len(self.buckets[size]) != 0:
+                return self.buckets[size]
+        return None
+
+    def undecided(self):
+        """
+        Iterate over all undecided variables.
+        """
+        for bucket in self.buckets.values():
+            yield from bucket
@@ -1,10 +1,44 @@
 #!/usr/bin/python3
 
-import copy as cp
 import itertools as it
+import math
+import multiprocessing as mp
+import os
+import pickle
+import sys
 
+from collections import OrderedDict, deque
 from pprint import pprint
 
+import sat
+from budget import BudgetExceeded, SearchBudget, SearchResult
+from dlx import SudokuExactCover
+from heuristics import DomainBuckets
+
+
+class NotEqual(object):
+
+    """
+    The set of all value pairs (x, y) with x != y. Used in place of an
+    explicit set of legal value pairs for the arcs of an Alldiff
+    constraint, which would otherwise hold n * (n - 1) pairs each.
+    """
+
+    def __contains__(self, pair):
+        return pair[0] != pair[1]
+
+    def __eq__(self, other):
+        return isinstance(other, NotEqual)
+
+    def __hash__(self):
+        return hash(NotEqual)
+
+    def __repr__(self):
+        return 'NOT_EQUAL'
+
+
+NOT_EQUAL = NotEqual()
+
 
 class CSP:
 
@@ -12,13 +46,61 @@ class CSP:
         # self.variables is a list of the variable names in the CSP
         self.variables = []
 
+        # self.order[i] is the position of variable i in self.variables
+        self.order = {}
+
         # self.domains[i] is a list of legal values for variable i
         self.domains = {}
 
-        # self.constraints[i][j] is a list of legal value pairs for
-        # the variable pair (i, j)
+        # self.constraints[i][j] is a set of legal value pairs for
+        # the variable pair (i, j), or NOT_EQUAL
         self.constraints = {}
 
+        # self.all_different is a list of variable groups that are
+        # constrained by a global Alldiff constraint, and
+        # self.all_different_of[i] lists the indices of the groups
+        # variable i takes part in
+        self.all_different = []
+        self.all_different_of = {}
+
+        # True while the structures above, other than the domains, are
+        # shared with other CSPs, see with_domains()
+        self.shared = False
+
+        # Heuristics used by the search, see backtracking_search()
+        self.variable_heuristic = 'mrv'
+        self.value_heuristic = 'default'
+
+        # True if the values are interchangeable and the search breaks
+        # their symmetry, see break_value_symmetry()
+        self.interchangeable_values = False
+
+        # self.buckets keeps the undecided variables ordered by domain
+        # size during the search, and self.weights[c] counts how many
+        # times constraint c has caused a domain wipeout, where c is
+        # either a frozenset of two variables or the index of an
+        # Alldiff group
+        self.buckets = None
+        self.weights = {}
+
+        # Nogoods learned by the backjumping search. self.nogoods is a
+        # bounded store of frozensets of (variable, value) pairs that
+        # can not all hold at once, least recently used first, and
+        # self.nogood_index[(i, x)] is the set of nogoods holding i = x
+        self.max_nogoods = 10000
+        self.nogoods = OrderedDict()
+        self.nogood_index = {}
+        self.num_nogood_prunes = 0
+
+        # The explanation of the last failed inference() call, see
+        # backjump()
+        self.last_conflict = None
+
+        # The SearchBudget of the running search, see solve(), and the
+        # attached SearchStats, see telemetry.py
+        self.budget = None
+        self.stats = None
+
         # Variables to record the number of backtracks and failed backtracks
         self.num_backtrack = 0
         self.num_backtrack_failed = 0
@@ -28,9 +110,49 @@ class CSP:
         Add a new variable to the CSP. 'name' is the variable name
         and 'domain' is a list of the legal values for the variable.
         """
+        self.unshare()
+        self.order[name] = len(self.variables)
         self.variables.append(name)
         self.domains[name] = list(domain)
         self.constraints[name] = {}
+        self.all_different_of[name] = []
+
+    def with_domains(self, domains):
+        """
+        Return a new CSP sharing the variables and constraints of this
+        CSP, but with the domains given by the dictionary 'domains'.
+        Variables missing from 'domains' keep their current domain. The
+        search never modifies the constraints, and adding variables or
+        constraints to either CSP afterwards first gives it its own
+        copy, see unshare().
+        """
+        self.shared = True
+        csp = CSP()
+        csp.shared = True
+        csp.variables = self.variables
+        csp.order = self.order
+        csp.constraints = self.constraints
+        csp.all_different = self.all_different
+        csp.all_different_of = self.all_different_of
+        csp.domains = {var: list(domains.get(var, domain))
+                       for var, domain in self.domains.items()}
+        return csp
+
+    def unshare(self):
+        """
+        Copy the variables and constraints this CSP shares with other
+        CSPs, so that they can be modified without affecting the
+        others. Called by the methods adding variables or constraints.
+        """
+        if not self.shared:
+            return
+        self.variables = list(self.variables)
+        self.order = dict(self.order)
+        self.constraints = {i: dict(Ci) for i, Ci in self.constraints.items()}
+        self.all_different = [list(group) for group in self.all_different]
+        self.all_different_of = {i: list(groups) for i, groups
+                                 in self.all_different_of.items()}
+        self.shared = False
 
     def get_all_possible_pairs(self, a, b):
         """
@@ -65,50 +187,458 @@ class CSP:
         to add the constraint the other way, j -> i, as all constraints
         are supposed to be two-way connections!
         """
+        self.unshare()
+        Di, Dj = self.domains[i], self.domains[j]
         if j not in self.constraints[i]:
             # First, get a list of all possible pairs
             # of values between variables i and j
-            Di, Dj = self.domains[i], self.domains[j]
             self.constraints[i][j] = self.get_all_possible_pairs(Di, Dj)
+        elif isinstance(self.constraints[i][j], NotEqual):
+            # Spell out the pairs of a compact != constraint
+            self.constraints[i][j] = (
+                (x, y) for (x, y) in self.get_all_possible_pairs(Di, Dj)
+                if x != y)
 
         def aux(value_pair):
             return filter_function(*value_pair)
 
         # Next, filter this list of value pairs through the function
         # 'filter_function', so that only the legal value pairs remain
-        self.constraints[i][j] = tuple(filter(aux, self.constraints[i][j]))
+        self.constraints[i][j] = frozenset(
+            filter(aux, self.constraints[i][j]))
 
     def add_all_different_constraint(self, variables):
         """
         Add an Alldiff constraint between all of the variables in the
         list 'variables'.
+
+        The constraint is stored both as pairwise != arcs, used by AC-3,
+        and as a global constraint, which is filtered by
+        filter_all_different() whenever AC-3 has reached a fixpoint.
+        Arcs without an earlier constraint use the compact NOT_EQUAL.
         """
+        self.unshare()
+        variables = list(variables)
+        for var in variables:
+            self.all_different_of[var].append(len(self.all_different))
+        self.all_different.append(variables)
+
         for (i, j) in self.get_all_possible_pairs(variables, variables):
-            if i != j:
+            if i == j:
+                continue
+            if j not in self.constraints[i]:
+                self.constraints[i][j] = NOT_EQUAL
+            elif not isinstance(self.constraints[i][j], NotEqual):
                 self.add_constraint_one_way(i, j, lambda x, y: x != y)
 
-    def backtracking_search(self):
+    def break_value_symmetry(self, enabled=True):
+        """
+        Opt in to value symmetry breaking, for CSPs such as graph
+        coloring where every variable has the same domain and every
+        constraint is !=, so that any permutation of the values turns a
+        solution into another. The search then only tries the values
+        already in use and one unused value, as the unused values all
+        lead to symmetric subtrees. This still finds a solution when
+        there is one, but iter_solutions() and count_solutions() only
+        see one solution per permutation of the values. The 'sat'
+        backend does not use it. Raises ValueError if the values are
+        not interchangeable.
+        """
+        if enabled:
+            values = set(self.domains[self.variables[0]]) \
+                if self.variables else set()
+            for i in self.variables:
+                if set(self.domains[i]) != values:
+                    raise ValueError(
+                        'Variable %r has a different domain' % i)
+                for j, Cij in self.constraints[i].items():
+                    if isinstance(Cij, NotEqual):
+                        continue
+                    if Cij != {(x, y) for x in self.domains[i]
+                               for y in self.domains[j] if x != y}:
+                        raise ValueError(
+                            'Constraint %r -> %r is not !=' % (i, j))
+        self.interchangeable_values = enabled
+
+    def backtracking_search(self, variable_heuristic='mrv',
+                            value_heuristic='default', verbose=True,
+                            search='chronological', backend='backtracking',
+                            encoding='direct'):
         """
         This functions starts the CSP solver and returns the found
         solution.
+
+        'variable_heuristic' is one of VARIABLE_HEURISTICS and selects
+        the next variable to branch on: 'mrv' picks the variable with
+        the fewest legal values, 'mrv-degree' breaks ties by the number
+        of undecided neighbours and 'dom/wdeg' divides the domain size
+        by the conflict weighted degree. 'value_heuristic' is one of
+        VALUE_HEURISTICS, where 'lcv' tries the least constraining
+        values first. If 'verbose' is False the number of backtracks is
+        not printed.
+
+        'search' is one of SEARCH_MODES: 'chronological' runs
+        backtrack(), and 'backjumping' runs backjump(), which jumps
+        straight back to the cause of a failure and learns nogoods.
+
+        'backend' is one of CSP_BACKENDS. With 'sat' the CSP is instead
+        compiled to CNF with the given 'encoding', one of
+        sat.ENCODINGS, and solved by the CDCL solver in sat.py. The
+        heuristics and search mode are then ignored, and the decisions
+        and conflicts of the SAT solver are counted as backtracks and
+        failed backtracks.
         """
-        # Make a so-called "deep copy" of the dictionary containing the
-        # domains of the CSP variables. The deep copy is required to
-        # ensure that any changes made to 'assignment' does not have any
-        # side effects elsewhere.
-        assignment = cp.deepcopy(self.domains)
+        self.set_heuristics(variable_heuristic, value_heuristic)
+        if search not in SEARCH_MODES:
+            raise ValueError('Unknown search mode %r' % search)
+        if backend not in CSP_BACKENDS:
+            raise ValueError('Unknown backend %r' % backend)
+
+        if backend == 'sat':
+            solution = self.sat_search(encoding)
+            if verbose:
+                print('Num backtrack =', self.num_backtrack)
+                print('Num backtrack failed =', self.num_backtrack_failed)
+            return solution
+
+        # No decisions have been made yet, so nothing explains the
+        # values pruned by the first AC-3 run
+        explain = None
+        if search == 'backjumping':
+            explain = {var: frozenset() for var in self.domains}
+
+        assignment = self.prepare_search(explain)
+        if assignment is None:
+            solution = None
+        elif search == 'backjumping':
+            solution, _ = self.backjump(assignment, explain)
+        else:
+            # Call backtrack with the partial assignment 'assignment'
+            solution = self.backtrack(assignment)
+        self.buckets = None
+
+        if verbose:
+            print('Num backtrack =', self.num_backtrack)
+            print('Num backtrack failed =', self.num_backtrack_failed)
+        return solution
+
+    def sat_search(self, encoding='direct'):
+        """
+        Solve the CSP with the CDCL SAT solver, see
+        backtracking_search(). Returns the solution or None.
+        """
+        cnf = sat.encode(self, encoding)
+        solver = sat.CDCLSolver(cnf.num_vars, cnf.clauses, self.budget)
+        try:
+            model = solver.solve()
+        finally:
+            self.num_backtrack += solver.decisions
+            self.num_backtrack_failed += solver.conflicts
+        if model is None:
+            return None
+        return cnf.decode(model)
+
+    def solve(self, budget=None, variable_heuristic='mrv',
+              value_heuristic='default', search='chronological',
+              backend='backtracking', encoding='direct'):
+        """
+        Run backtracking_search() within the limits of the SearchBudget
+        'budget'. Returns a SearchResult, whose status is 'unknown' if
+        the budget ran out or the search was cancelled before the
+        search finished.
+        """
+        budget = budget or SearchBudget()
+        budget.start()
+        backtracks = self.num_backtrack
+        failed = self.num_backtrack_failed
+
+        self.budget = budget
+        try:
+            solution = self.backtracking_search(
+                variable_heuristic, value_heuristic, verbose=False,
+                search=search, backend=backend, encoding=encoding)
+            status = 'unsatisfiable' if solution is None else 'solved'
+            reason = None
+        except BudgetExceeded as e:
+            solution = None
+            status = 'unknown'
+            reason = e.reason
+        finally:
+            self.budget = None
+            self.buckets = None
+
+        return SearchResult(
+            status, solution, reason, budget.nodes,
+            self.num_backtrack - backtracks,
+            self.num_backtrack_failed - failed, budget.elapsed())
+
+    def prepare_search(self, explain=None):
+        """
+        Set up the root of the search. Returns the root assignment, or
+        None if the CSP is not arc-consistent.
+        """
+        # Copy the dictionary containing the domains of the CSP
+        # variables, so that any changes made to 'assignment' do not
+        # have any side effects elsewhere. The values are never changed,
+        # so copying the lists is enough.
+        assignment = {var: list(domain)
+                      for var, domain in self.domains.items()}
 
         # Run AC-3 on all constraints in the CSP, to weed out all of the
-        # values that are not arc-consistent to begin with
-        self.inference(assignment, self.get_all_arcs())
+        # values that are not arc-consistent to begin with. This can
+        # take a while on large boards, so the budget is polled as the
+        # arcs are revised.
+        if self.stats is not None:
+            self.stats.phase = 'root'
+        if not self.inference(assignment, self.get_all_arcs(),
+                              explain=explain, budget=self.budget):
+            return None
+
+        # Bucket the undecided variables by domain size
+        self.buckets = DomainBuckets(assignment)
+        return assignment
 
-        # Call backtrack with the partial assignment 'assignment'
-        solution = self.backtrack(assignment)
-        print('Num backtrack =', self.num_backtrack)
-        print('Num backtrack failed =', self.num_backtrack_failed)
+    def search_from(self, assignment, variable_heuristic='mrv',
+                    value_heuristic='default'):
+        """
+        Run backtrack() from 'assignment', an already arc-consistent
+        assignment such as the one kept by a CSPSession, skipping the
+        AC-3 run over all arcs. Returns the solution or None.
+        """
+        self.set_heuristics(variable_heuristic, value_heuristic)
+        self.buckets = DomainBuckets(assignment)
+        try:
+            return self.backtrack(assignment)
+        finally:
+            self.buckets = None
+
+    def iter_solutions(self, variable_heuristic='mrv',
+                       value_heuristic='default'):
+        """
+        Generator yielding every solution of the CSP, in the format of
+        backtracking_search(). The solutions are found lazily, one at a
+        time as they are asked for. Only one search may run on a CSP at
+        a time, so do not interleave two of these generators. The
+        search state is cleared once the generator is exhausted, closed
+        or garbage collected, so it is fine to stop early.
+        """
+        self.set_heuristics(variable_heuristic, value_heuristic)
+        try:
+            assignment = self.prepare_search()
+            if assignment is not None:
+                yield from self.enumerate_solutions(assignment)
+        finally:
+            # Also runs when the generator is closed before the end
+            self.buckets = None
+
+    def count_solutions(self, limit=None, variable_heuristic='mrv',
+                        value_heuristic='default'):
+        """
+        Count the solutions of the CSP without building them. If
+        'limit' is given the search stops as soon as 'limit' solutions
+        have been found, so count_solutions(2) == 1 checks that a
+        puzzle has a unique solution.
+        """
+        self.set_heuristics(variable_heuristic, value_heuristic)
+        try:
+            assignment = self.prepare_search()
+            if assignment is None:
+                return 0
+            return self.count(assignment, limit)
+        finally:
+            self.buckets = None
+
+    def enumerate_solutions(self, assignment, depth=0):
+        """
+        Like backtrack(), but yields every solution below the partial
+        assignment 'assignment' instead of returning the first one.
+        """
+        # Increment the number of backtrack calls
+        self.visit(assignment, depth)
+
+        var = self.select_unassigned_variable(assignment)
+        if var is None:
+            yield assignment
+            return
+
+        found = False
+        for value in self.order_domain_values(var, assignment):
+            assigCopy = self.copy_assignment(assignment)
+            assigCopy[var] = [value]
+
+            neighbors = self.get_all_neighboring_arcs(var)
+            mark = self.buckets.mark()
+            reduced = {var}
+            if self.inference(assigCopy, neighbors, reduced):
+                for k in reduced:
+                    self.buckets.update(k, len(assigCopy[k]))
+                children = self.enumerate_solutions(assigCopy, depth + 1)
+                for solution in children:
+                    found = True
+                    yield solution
+            self.buckets.undo(mark)
+
+        if not found:
+            self.num_backtrack_failed += 1
+
+    def count(self, assignment, limit=None, depth=0):
+        """
+        Like backtrack(), but returns the number of solutions below the
+        partial assignment 'assignment', stopping at 'limit' solutions.
+        """
+        # Increment the number of backtrack calls
+        self.visit(assignment, depth)
+
+        var = self.select_unassigned_variable(assignment)
+        if var is None:
+            return 1
+
+        count = 0
+        for value in self.order_domain_values(var, assignment):
+            assigCopy = self.copy_assignment(assignment)
+            assigCopy[var] = [value]
+
+            neighbors = self.get_all_neighboring_arcs(var)
+            mark = self.buckets.mark()
+            reduced = {var}
+            if self.inference(assigCopy, neighbors, reduced):
+                for k in reduced:
+                    self.buckets.update(k, len(assigCopy[k]))
+                left = None if limit is None else limit - count
+                count += self.count(assigCopy, left, depth + 1)
+            self.buckets.undo(mark)
+            if limit is not None and count >= limit:
+                break
+
+        if count == 0:
+            self.num_backtrack_failed += 1
+        return count
+
+    def set_heuristics(self, variable_heuristic, value_heuristic):
+        """
+        Validate and set the heuristics used by the search.
+        """
+        if variable_heuristic not in VARIABLE_HEURISTICS:
+            raise ValueError(
+                'Unknown variable heuristic %r' % variable_heuristic)
+        if value_heuristic not in VALUE_HEURISTICS:
+            raise ValueError('Unknown value heuristic %r' % value_heuristic)
+        self.variable_heuristic = variable_heuristic
+        self.value_heuristic = value_heuristic
+
+    def parallel_search(self, processes=None, subtrees=None,
+                        variable_heuristic='mrv', value_heuristic='default',
+                        verbose=True, budget=None):
+        """
+        Parallel version of backtracking_search(). The top levels of the
+        search tree are expanded until there are at least 'subtrees'
+        open nodes, by default four per process, and the subtrees are
+        searched by a pool of 'processes' worker processes. As soon as
+        one worker finds a solution the remaining workers are cancelled.
+        The nodes expanded while building the frontier are counted in
+        num_backtrack along with those of the workers. If 'verbose' is
+        False the number of backtracks is not printed.
+
+        'budget' is an optional SearchBudget, as taken by solve(). It is
+        started here and checked while the frontier is built, and every
+        worker gets a copy, so the time limit and cancellation also
+        hold in the workers. The node limit holds in each worker, and
+        for the total as the subtrees finish. BudgetExceeded is raised
+        once the budget runs out, after cancelling the workers. To
+        reach the workers, a cancellation token has to be a
+        multiprocessing.Event.
+        """
+        self.set_heuristics(variable_heuristic, value_heuristic)
+        processes = processes or mp.cpu_count()
+        subtrees = subtrees or 4 * processes
+
+        if budget is not None:
+            budget.start()
+        self.budget = budget
+        try:
+            frontier = self.expand_frontier(subtrees)
+            solution = None
+            if len(frontier) != 0:
+                solution = self.search_frontier(frontier, processes)
+        finally:
+            self.budget = None
+            self.buckets = None
+
+        if verbose:
+            print('Num backtrack =', self.num_backtrack)
+            print('Num backtrack failed =', self.num_backtrack_failed)
         return solution
 
-    def backtrack(self, assignment):
+    def expand_frontier(self, subtrees):
+        """
+        Expand the search tree one level at a time, branching on the
+        variable picked by the variable heuristic, until there are at
+        least 'subtrees' open nodes or only solutions are left. Returns
+        the open nodes, an empty list if there is no solution.
+        """
+        root = self.prepare_search()
+        if root is None:
+            return []
+
+        frontier = [root]
+        depth = 0
+        while len(frontier) < subtrees:
+            expanded = []
+            branched = False
+            for node in frontier:
+                self.buckets = DomainBuckets(node)
+                var = self.select_unassigned_variable(node)
+                if var is None:
+                    expanded.append(node)
+                    continue
+                self.visit(node, depth)
+                branched = True
+                children = 0
+                for value in self.order_domain_values(var, node):
+                    child = self.copy_assignment(node)
+                    child[var] = [value]
+                    neighbors = self.get_all_neighboring_arcs(var)
+                    if self.inference(child, neighbors):
+                        expanded.append(child)
+                        children += 1
+                if children == 0:
+                    self.num_backtrack_failed += 1
+            self.buckets = None
+            frontier = expanded
+            depth += 1
+            if not branched or len(frontier) == 0:
+                # Nothing left to branch on
+                break
+
+        return frontier
+
+    def search_frontier(self, frontier, processes):
+        """
+        Search the subtrees below the open nodes 'frontier' on a pool
+        of 'processes' worker processes, see parallel_search().
+        Returns the first solution found, or None.
+        """
+        budget = self.budget
+        with mp.Pool(processes, _init_worker, (self,)) as pool:
+            results = pool.imap_unordered(_search_subtree, frontier)
+            for result, num_backtrack, num_backtrack_failed, reason \
+                    in results:
+                self.num_backtrack += num_backtrack
+                self.num_backtrack_failed += num_backtrack_failed
+                # Leaving the with block cancels the workers
+                if reason is not None:
+                    raise BudgetExceeded(reason)
+                if budget is not None:
+                    budget.nodes += num_backtrack
+                    if budget.max_nodes is not None and \
+                            budget.nodes > budget.max_nodes:
+                        raise BudgetExceeded('nodes')
+                    budget.check_limits()
+                if result is not None:
+                    return result
+        return None
+
+    def backtrack(self, assignment, depth=0):
         """
         The function 'Backtrack' from the pseudocode in the
         textbook.
@@ -127,14 +657,14 @@ class CSP:
         should get reduced as AC-3 discovers illegal values.
 
         IMPORTANT: For every iteration of the for-loop in the
-        pseudocode, you need to make a deep copy of 'assignment' into a
+        pseudocode, you need to make a copy of 'assignment' into a
         new variable before changing it. Every iteration of the for-loop
         should have a clean slate and not see any traces of the old
         assignments and inferences that took place in previous
         iterations of the loop.
         """
         # Increment the number of backtrack calls
-        self.num_backtrack += 1
+        self.visit(assignment, depth)
 
         # Get the next box to check on
         var = self.select_unassigned_variable(assignment)
@@ -143,26 +673,155 @@ class CSP:
             return assignment
 
         # For all possible values in the box
-        for value in assignment[var]:
+        for value in self.order_domain_values(var, assignment):
             # Create a copy of the assignment
-            assigCopy = cp.deepcopy(assignment)
+            assigCopy = self.copy_assignment(assignment)
             # Assign the value to the box
             assigCopy[var] = [value]
 
             # Generate all arcs from the box
             neighbors = self.get_all_neighboring_arcs(var)
+            # Remember the state of the variable buckets
+            mark = self.buckets.mark() if self.buckets is not None else None
+            reduced = {var}
             # If the board is consistent
-            if self.inference(assigCopy, neighbors):
+            if self.inference(assigCopy, neighbors, reduced):
+                # Keep the buckets in step with the reduced domains
+                if self.buckets is not None:
+                    for k in reduced:
+                        self.buckets.update(k, len(assigCopy[k]))
                 # Recursive call with the assignment copy
-                result = self.backtrack(assigCopy)
+                result = self.backtrack(assigCopy, depth + 1)
                 # If the result is valid, return result
                 if result is not None:
                     return result
+            # Restore the buckets before trying the next value
+            if self.buckets is not None:
+                self.buckets.undo(mark)
 
         # If no values generated a valid board, then backtrack
         self.num_backtrack_failed += 1
         return None
 
+    def backjump(self, assignment, explain, depth=0):
+        """
+        Conflict-directed backjumping on top of the same inference as
+        backtrack(). 'explain[i]' is the set of decided variables whose
+        values explain the values pruned from the domain of i so far.
+
+        Returns a pair (solution, conflict). On failure 'conflict' is
+        the set of decided variables that caused it. If the variable
+        decided by this node is not in the conflict set of a subtree,
+        no other value can help, and the failure is passed straight
+        back up to the culprit. Every failure is also learned as a
+        nogood, that prunes the same combination of values later on.
+        """
+        # Increment the number of backtrack calls
+        self.visit(assignment, depth)
+
+        # Get the next variable to decide
+        var = self.select_unassigned_variable(assignment)
+        # If there is no variable left, result found
+        if var is None:
+            return assignment, None
+
+        # Values already pruned from var are part of any failure
+        conflict = set(explain[var])
+
+        for value in self.order_domain_values(var, assignment):
+            # Skip values ruled out by a learned nogood
+            nogood = self.violated_nogood(assignment, var, value)
+            if nogood is not None:
+                self.num_nogood_prunes += 1
+                conflict |= {i for i, _ in nogood if i != var}
+                continue
+
+            assigCopy = self.copy_assignment(assignment)
+            assigCopy[var] = [value]
+            explainCopy = dict(explain)
+            explainCopy[var] = explain[var] | {var}
+
+            neighbors = self.get_all_neighboring_arcs(var)
+            mark = self.buckets.mark()
+            reduced = {var}
+            if self.inference(assigCopy, neighbors, reduced, explainCopy):
+                for k in reduced:
+                    self.buckets.update(k, len(assigCopy[k]))
+                result, culprits = self.backjump(assigCopy, explainCopy,
+                                                 depth + 1)
+                if result is not None:
+                    return result, None
+            else:
+                culprits = self.last_conflict
+            self.buckets.undo(mark)
+
+            if var not in culprits:
+                # The value of var played no part in the failure, jump
+                # back past it
+                self.num_backtrack_failed += 1
+                self.learn_nogood(assignment, culprits)
+                return None, culprits
+            conflict |= culprits - {var}
+
+        # If no values generated a valid assignment, then backtrack
+        self.num_backtrack_failed += 1
+        conflict.discard(var)
+        self.learn_nogood(assignment, conflict)
+        return None, conflict
+
+    def learn_nogood(self, assignment, culprits):
+        """
+        Record that the current values of the decided variables in
+        'culprits' can not all hold at once. The store keeps at most
+        self.max_nogoods nogoods, dropping the least recently used.
+        """
+        if len(culprits) == 0:
+            return
+        nogood = frozenset((i, assignment[i][0]) for i in culprits)
+        if nogood in self.nogoods:
+            self.nogoods.move_to_end(nogood)
+            return
+
+        self.nogoods[nogood] = None
+        for pair in nogood:
+            self.nogood_index.setdefault(pair, set()).add(nogood)
+
+        if len(self.nogoods) > self.max_nogoods:
+            old, _ = self.nogoods.popitem(last=False)
+            for pair in old:
+                self.nogood_index[pair].discard(old)
+
+    def violated_nogood(self, assignment, var, value):
+        """
+        Return a learned nogood that deciding var = value would
+        complete, or None.
+        """
+        for nogood in self.nogood_index.get((var, value), ()):
+            if all(i == var or assignment[i] == [x] for i, x in nogood):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
+    def visit(self, assignment, depth):
+        """
+        Account for a search node at 'depth' decisions below the root:
+        counts it, checks the budget of solve() and records it in the
+        attached SearchStats, if any.
+        """
+        self.num_backtrack += 1
+        if self.budget is not None:
+            self.budget.check()
+        if self.stats is not None:
+            self.stats.node(self, assignment, depth)
+
+    def copy_assignment(self, assignment):
+        """
+        Copy 'assignment' before changing it. The lists of legal values
+        are never changed in place, only replaced, so a shallow copy
+        leaves no traces in 'assignment'.
+        """
+        return dict(assignment)
+
     def select_unassigned_variable(self, assignment):
         """
         The function 'Select-Unassigned-Variable' from the pseudocode
@@ -170,49 +829,310 @@ class CSP:
         in 'assignment' that have not yet been decided, i.e. whose list
         of legal values has a length greater than one.
         """
-        def domainMoreThanOne(kv):
-            return len(kv[1]) > 1
-        # Possible candidates with domains larger than 1
-        candidates = tuple(filter(domainMoreThanOne, assignment.items()))
-        # If there are no candidates, return None
-        if len(candidates) == 0:
+        # Outside of backtracking_search(), fall back to a full scan
+        if self.buckets is None:
+            def domainMoreThanOne(kv):
+                return len(kv[1]) > 1
+            # Possible candidates with domains larger than 1
+            candidates = tuple(filter(domainMoreThanOne, assignment.items()))
+            # If there are no candidates, return None
+            if len(candidates) == 0:
+                return None
+            # Find the candidate with minimum domain and return variable
+            min_cand = min(candidates, key=lambda kv: len(kv[1]))
+            return min_cand[0]
+
+        if self.variable_heuristic == 'dom/wdeg':
+            candidates = tuple(self.buckets.undecided())
+            if len(candidates) == 0:
+                return None
+            return min(candidates, key=lambda var: (
+                len(assignment[var]) / self.weighted_degree(var, assignment),
+                self.order[var]))
+
+        # The candidates with the fewest legal values
+        candidates = self.buckets.smallest()
+        if candidates is None:
             return None
-        # Find the candidate with minimum domain and return variable
-        min_cand = min(candidates, key=lambda kv: len(kv[1]))
-        return min_cand[0]
+        if self.variable_heuristic == 'mrv-degree':
+            return min(candidates, key=lambda var: (
+                -self.degree(var, assignment), self.order[var]))
+        return min(candidates, key=self.order.__getitem__)
+
+    def degree(self, var, assignment):
+        """
+        The number of undecided variables constrained by 'var'.
+        """
+        return sum(1 for j in self.constraints[var] if len(assignment[j]) > 1)
 
-    def inference(self, assignment, queue):
+    def weighted_degree(self, var, assignment):
+        """
+        The sum of the weights of the constraints between 'var' and at
+        least one other undecided variable, as used by dom/wdeg.
+        """
+        wdeg = sum(self.weights.get(frozenset((var, j)), 1)
+                   for j in self.constraints[var] if len(assignment[j]) > 1)
+        for g in self.all_different_of[var]:
+            if any(len(assignment[j]) > 1 for j in self.all_different[g]
+                   if j != var):
+                wdeg += self.weights.get(g, 1)
+        return max(wdeg, 1)
+
+    def order_domain_values(self, var, assignment):
+        """
+        The function 'Order-Domain-Values' from the pseudocode in the
+        textbook. With the 'lcv' value heuristic, the values ruling out
+        the fewest values of the undecided neighbours come first, and
+        with break_value_symmetry() symmetric values are left out.
+        """
+        values = assignment[var]
+        if self.interchangeable_values:
+            values = self.symmetric_values_removed(values, assignment)
+        if self.value_heuristic != 'lcv':
+            return values
+
+        def ruled_out(x):
+            count = 0
+            for j, Cij in self.constraints[var].items():
+                Dj = assignment[j]
+                if len(Dj) > 1:
+                    count += sum(1 for y in Dj if (x, y) not in Cij)
+            return count
+
+        return sorted(values, key=ruled_out)
+
+    def symmetric_values_removed(self, values, assignment):
+        """
+        Drop all but the first of the 'values' that no decided variable
+        in 'assignment' takes. With interchangeable values these lead
+        to symmetric subtrees, see break_value_symmetry().
+        """
+        unused = set(values)
+        for domain in assignment.values():
+            if len(domain) == 1:
+                unused.discard(domain[0])
+                if len(unused) <= 1:
+                    return values
+        if len(unused) <= 1:
+            return values
+        first = next(x for x in values if x in unused)
+        return [x for x in values if x not in unused or x == first]
+
+    def inference(self, assignment, queue, reduced=None, explain=None,
+                  budget=None):
         """
         The function 'AC-3' from the pseudocode in the textbook.
         'assignment' is the current partial assignment, that contains
         the lists of legal values for each undecided variable. 'queue'
-        is the initial queue of arcs that should be visited.
-        """
-        # While the queue is not empty
-        while len(queue) != 0:
-            # Pop the first item in the queue
-            i, j = queue.pop(0)
-
-            # Update the arc
-            # If the arc is valid, update the queue
-            if self.revise(assignment, i, j):
-                # Check the domain
-                Di = assignment[i]
-                # If the domain is empty, the arc does not
-                # create a valid board
-                if len(Di) == 0:
-                    # The board is not consistent
+        is the initial queue of arcs that should be visited. If the set
+        'reduced' is given, every variable whose domain is reduced gets
+        added to it.
+
+        If the dictionary 'explain' is given, the explanations of the
+        pruned domains are kept up to date as in backjump(), and the
+        explanation of a failure is left in self.last_conflict.
+
+        If a SearchBudget 'budget' is given, it is polled for every arc
+        revised and every Alldiff group filtered, and BudgetExceeded is
+        raised once it runs out.
+        """
+        # Variables whose domains have been reduced since the global
+        # constraints last were filtered
+        changed = {j for _, j in queue}
+
+        # Arcs are queued at most once at a time
+        queue = deque(queue)
+        queued = set(queue)
+        stats = self.stats
+        if stats is not None:
+            stats.arcs_enqueued += len(queue)
+
+        while True:
+            # While the queue is not empty
+            while len(queue) != 0:
+                # Pop the first item in the queue
+                i, j = queue.popleft()
+                queued.discard((i, j))
+                if budget is not None:
+                    budget.poll()
+
+                # Update the arc
+                # If the arc is valid, update the queue
+                if self.revise(assignment, i, j):
+                    # The values of i were pruned because of j
+                    if explain is not None:
+                        explain[i] = explain[i] | explain[j]
+                    # Check the domain
+                    Di = assignment[i]
+                    # If the domain is empty, the arc does not
+                    # create a valid board
+                    if len(Di) == 0:
+                        # The board is not consistent
+                        key = frozenset((i, j))
+                        self.weights[key] = self.weights.get(key, 1) + 1
+                        if explain is not None:
+                            self.last_conflict = explain[i]
+                        return False
+
+                    # If the domain is not empty,
+                    # add all intermediate arcs to the queue
+                    changed.add(i)
+                    if reduced is not None:
+                        reduced.add(i)
+                    for k, _ in self.get_all_neighboring_arcs(i):
+                        if k != i and k != j and (k, i) not in queued:
+                            queue.append((k, i))
+                            queued.add((k, i))
+                            if stats is not None:
+                                stats.arcs_enqueued += 1
+
+            # The arcs are consistent, filter the global Alldiff
+            # constraints touched by the reduced domains
+            groups = {g for var in changed for g in self.all_different_of[var]}
+            changed = set()
+            for g in sorted(groups):
+                if budget is not None:
+                    budget.poll()
+                pruned = self.filter_all_different(
+                    assignment, self.all_different[g])
+                if explain is not None and pruned != set():
+                    # Blame the whole group for its prunings
+                    cause = frozenset().union(
+                        *(explain[k] for k in self.all_different[g]))
+                    for k in pruned or ():
+                        explain[k] = cause
+                if pruned is None:
+                    self.weights[g] = self.weights.get(g, 1) + 1
+                    if explain is not None:
+                        self.last_conflict = cause
                     return False
+                changed |= pruned
+            if reduced is not None:
+                reduced |= changed
 
-                # If the domain is not empty,
-                # add all intermediate arcs to the queue
-                for k, _ in self.get_all_neighboring_arcs(i):
-                    if k != i and k != j:
-                        queue.append((k, i))
+            # If nothing was pruned, a fixpoint has been reached
+            if len(changed) == 0:
+                break
+
+            # Otherwise revisit the arcs going to the pruned variables,
+            # in a fixed order to keep the search deterministic
+            for i in sorted(changed, key=self.order.__getitem__):
+                for arc in self.get_all_neighboring_arcs(i):
+                    if arc not in queued:
+                        queue.append(arc)
+                        queued.add(arc)
+                        if stats is not None:
+                            stats.arcs_enqueued += 1
 
         # If all arcs create a valid board, then it is consistent
         return True
 
+    def filter_all_different(self, assignment, variables):
+        """
+        Generalized arc consistency for the Alldiff constraint on
+        'variables', following Regin's matching based algorithm. A value
+        is kept in a domain only if it takes part in some maximum
+        matching between the variables and their values. Hidden singles,
+        naked subsets and pigeonhole failures are all caught this way.
+
+        Returns the set of variables whose domains were reduced, or None
+        if the constraint can not be satisfied.
+        """
+        # Find a maximum matching with augmenting paths
+        match_var = {}
+        match_val = {}
+
+        def augment(var, seen):
+            for value in assignment[var]:
+                if value in seen:
+                    continue
+                seen.add(value)
+                if value not in match_val or \
+                        augment(match_val[value], seen):
+                    match_var[var] = value
+                    match_val[value] = var
+                    return True
+            return False
+
+        for var in variables:
+            if not augment(var, set()):
+                # Pigeonhole, more variables than available values
+                return None
+
+        # Matching edges go from variable to value, all other edges go
+        # from value to variable. Nodes are tagged to keep variable
+        # names and values apart.
+        graph = {('var', var): [('val', match_var[var])]
+                 for var in variables}
+        for var in variables:
+            for value in assignment[var]:
+                if value != match_var[var]:
+                    graph.setdefault(('val', value), []).append(('var', var))
+                graph.setdefault(('val', value), [])
+
+        # Every edge on an alternating path from a free value belongs
+        # to some maximum matching
+        reachable = set()
+        stack = [node for node in graph
+                 if node[0] == 'val' and node[1] not in match_val]
+        while stack:
+            node = stack.pop()
+            if node not in reachable:
+                reachable.add(node)
+                stack.extend(graph[node])
+
+        # So does every edge on an alternating cycle, i.e. every edge
+        # within a strongly connected component
+        component = self.strongly_connected_components(graph)
+
+        pruned = set()
+        for var in variables:
+            keep = [value for value in assignment[var]
+                    if value == match_var[var] or
+                    ('val', value) in reachable or
+                    component[('val', value)] == component[('var', var)]]
+            if len(keep) != len(assignment[var]):
+                assignment[var] = keep
+                pruned.add(var)
+
+        return pruned
+
+    def strongly_connected_components(self, graph):
+        """
+        Tarjan's algorithm. 'graph' maps every node to a list of its
+        successors. Returns a dictionary mapping every node to the index
+        of its strongly connected component.
+        """
+        index = {}
+        lowlink = {}
+        component = {}
+        stack = []
+        on_stack = set()
+
+        def visit(node):
+            index[node] = lowlink[node] = len(index)
+            stack.append(node)
+            on_stack.add(node)
+            for succ in graph[node]:
+                if succ not in index:
+                    visit(succ)
+                    lowlink[node] = min(lowlink[node], lowlink[succ])
+                elif succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            if lowlink[node] == index[node]:
+                while True:
+                    succ = stack.pop()
+                    on_stack.discard(succ)
+                    component[succ] = index[node]
+                    if succ == node:
+                        break
+
+        for node in graph:
+            if node not in index:
+                visit(node)
+
+        return component
+
     def revise(self, assignment, i, j):
         """
         The function 'Revise' from the pseudocode in the textbook.
@@ -223,29 +1143,28 @@ class CSP:
         between i and j, the value should be deleted from i's list of
         legal values in 'assignment'.
         """
-        # Variable to check if some domains have been altered
-        revised = False
         # Domains for i and j
         Di, Dj = assignment[i], assignment[j]
         # Set of possible solutions for arc i and j
-        Cij_set = set(self.constraints[i][j])
-
-        # For all values in the domain i
-        for x in Di:
-            # Create the set of all possible values for j
-            Cj_set = {(x, y) for y in Dj if x != y}
-            # The set which is the union of Cij and Cj
-            valid_set = Cij_set & Cj_set
-
-            # If it is empty then there does not
-            # exist a value pair which satisfies the arc
-            if len(valid_set) == 0:
-                # Remove the value x from the domain i
-                Di.remove(x)
-                revised = True
+        Cij = self.constraints[i][j]
+
+        if isinstance(Cij, NotEqual):
+            # Only a decided j can rule out a value of i
+            if len(Dj) != 1 or Dj[0] not in Di:
+                return False
+            assignment[i] = [x for x in Di if x != Dj[0]]
+            return True
+
+        # Keep the values of i that have a legal partner in j. The
+        # domain is replaced instead of changed in place, since
+        # copies of the assignment share the lists.
+        valid = [x for x in Di if any((x, y) in Cij for y in Dj)]
 
         # Return if some domains have been altered
-        return revised
+        if len(valid) == len(Di):
+            return False
+        assignment[i] = valid
+        return True
 
 
 def create_map_coloring_csp():
@@ -272,75 +1191,263 @@ def create_map_coloring_csp():
     return csp
 
 
+# Cell symbols of the character based board format, '0' and '.' are
+# empty cells. A board of size n uses the first n symbols.
+SUDOKU_SYMBOLS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def sudoku_symbols(size):
+    """
+    The list of values of a Sudoku board with 'size' rows.
+    """
+    if size <= len(SUDOKU_SYMBOLS):
+        return list(SUDOKU_SYMBOLS[:size])
+    return [str(value) for value in range(1, size + 1)]
+
+
+def read_sudoku_board(filename):
+    """
+    Read a Sudoku board of any size n = b * b from the text file named
+    'filename'. Every line is a row, given either as n symbols from
+    SUDOKU_SYMBOLS, or as n whitespace separated numbers from 1 to n.
+    In both formats '0' is an empty cell, and so is '.' in the first.
+    Returns a list of rows of the symbols of sudoku_symbols(n), with
+    '0' for the empty cells.
+    """
+    with open(filename, 'r') as f:
+        lines = [line.split() for line in f if line.strip()]
+
+    size = len(lines)
+    box = math.isqrt(size)
+    if box * box != size:
+        raise ValueError('%s: %d rows is not a square number' %
+                         (filename, size))
+    symbols = sudoku_symbols(size)
+
+    board = []
+    for cells in lines:
+        if len(cells) == 1:
+            # One symbol per character
+            cells = ['0' if c == '.' else c for c in cells[0]]
+        else:
+            for c in cells:
+                if not c.isdigit() or int(c) > size:
+                    raise ValueError('%s: invalid cell %r' % (filename, c))
+            cells = ['0' if int(c) == 0 else symbols[int(c) - 1]
+                     for c in cells]
+        if len(cells) != size:
+            raise ValueError('%s: expected rows of %d cells' %
+                             (filename, size))
+        for c in cells:
+            if c != '0' and c not in symbols:
+                raise ValueError('%s: invalid cell %r' % (filename, c))
+        board.append(cells)
+
+    return board
+
+
 def create_sudoku_csp(filename):
     """
     Instantiate a CSP representing the Sudoku board found in the text
-    file named 'filename' in the current directory.
+    file named 'filename' in the current directory. Boards of any size
+    n = b * b are supported, see read_sudoku_board().
+    """
+    board = read_sudoku_board(filename)
+    return sudoku_from_template(get_sudoku_template(len(board)), board)
+
+
+def create_sudoku_solver(filename, backend='csp'):
+    """
+    Instantiate a solver for the Sudoku board found in the text file
+    named 'filename'. 'backend' is one of SUDOKU_BACKENDS: 'csp' gives
+    the CSP of create_sudoku_csp(), and 'dlx' an exact cover solver
+    using dancing links. Both are solved by calling
+    backtracking_search(), give solutions in the same format and count
+    their search nodes in num_backtrack.
+    """
+    if backend == 'csp':
+        return create_sudoku_csp(filename)
+    if backend == 'dlx':
+        board = read_sudoku_board(filename)
+        return SudokuExactCover(board, sudoku_symbols(len(board)))
+    raise ValueError('Unknown Sudoku backend %r' % backend)
+
+
+def build_sudoku_csp(board):
+    """
+    Instantiate a CSP representing the Sudoku board given as a
+    sequence of n rows of n symbols each, where '0' marks an empty cell
+    and n is a square number. The constraints are compiled from
+    scratch, see get_sudoku_template() for a cheaper way to create many
+    boards.
     """
     csp = CSP()
-    board = tuple(map(lambda x: x.strip(), open(filename, 'r')))
+    size = len(board)
+    box = math.isqrt(size)
+    symbols = sudoku_symbols(size)
 
-    for row in range(9):
-        for col in range(9):
+    for row in range(size):
+        for col in range(size):
             if board[row][col] == '0':
-                csp.add_variable('%d-%d' % (row, col), map(str, range(1, 10)))
+                csp.add_variable('%d-%d' % (row, col), symbols)
             else:
                 csp.add_variable('%d-%d' % (row, col), [board[row][col]])
 
-    for row in range(9):
-        pairs = ['%d-%d' % (row, col) for col in range(9)]
+    for row in range(size):
+        pairs = ['%d-%d' % (row, col) for col in range(size)]
         csp.add_all_different_constraint(pairs)
 
-    for col in range(9):
-        pairs = ['%d-%d' % (row, col) for row in range(9)]
+    for col in range(size):
+        pairs = ['%d-%d' % (row, col) for row in range(size)]
         csp.add_all_different_constraint(pairs)
 
-    for box_row in range(3):
-        for box_col in range(3):
+    for box_row in range(box):
+        for box_col in range(box):
             cells = []
-            for row in range(box_row * 3, (box_row + 1) * 3):
-                for col in range(box_col * 3, (box_col + 1) * 3):
+            for row in range(box_row * box, (box_row + 1) * box):
+                for col in range(box_col * box, (box_col + 1) * box):
                     cells.append('%d-%d' % (row, col))
             csp.add_all_different_constraint(cells)
 
     return csp
 
 
+# The compiled empty board templates by board size, see
+# get_sudoku_template()
+_sudoku_templates = {}
+
+
+def get_sudoku_template(size=9, path=None):
+    """
+    Return the CSP of an empty Sudoku board with 'size' rows, whose
+    constraints are shared by every board made with
+    sudoku_from_template(). The template is compiled once per process
+    and cached in memory. If 'path' is given the template is also
+    cached on disk: it is loaded from 'path' if the file exists, and
+    written to it otherwise.
+    """
+    template = _sudoku_templates.get(size)
+    exists = path is not None and os.path.exists(path)
+
+    if template is None and exists:
+        with open(path, 'rb') as f:
+            template = pickle.load(f)
+        if len(template.variables) != size * size:
+            raise ValueError('%s: not a template for size %d' %
+                             (path, size))
+    elif template is None:
+        template = build_sudoku_csp([['0'] * size] * size)
+
+    # Also write a template found in memory, so the cache on disk is
+    # there for other processes whichever way the template was made
+    if path is not None and not exists:
+        with open(path, 'wb') as f:
+            pickle.dump(template, f, pickle.HIGHEST_PROTOCOL)
+
+    _sudoku_templates[size] = template
+    return template
+
+
+def sudoku_from_template(template, board):
+    """
+    Instantiate a CSP representing the Sudoku 'board', given as in
+    build_sudoku_csp(), by applying the clues as domains to the
+    compiled 'template' from get_sudoku_template().
+    """
+    clues = {}
+    for row in range(len(board)):
+        for col in range(len(board)):
+            if board[row][col] != '0':
+                clues['%d-%d' % (row, col)] = [board[row][col]]
+    return template.with_domains(clues)
+
+
 def print_sudoku_solution(solution):
     """
     Convert the representation of a Sudoku solution as returned from
     the method CSP.backtracking_search(), into a human readable
-    representation.
+    representation. Boards of any size n = b * b are supported.
     """
-    holdr = "{} {} {} | {} {} {} | {} {} {}"
-    delim = "\n------+-------+------\n"
+    size = math.isqrt(len(solution))
+    box = math.isqrt(size)
+    width = max(len(value) for domain in solution.values()
+                for value in domain)
+
+    holdr = " | ".join(" ".join("{}" for _ in range(box))
+                       for _ in range(box))
+    delim = "\n" + "-+-".join("-" * ((width + 1) * box - 1)
+                              for _ in range(box)) + "\n"
 
-    aux_board = "\n".join(holdr for _ in range(3))
-    board = delim.join(aux_board for _ in range(3))
+    aux_board = "\n".join(holdr for _ in range(box))
+    board = delim.join(aux_board for _ in range(box))
 
-    pairs = ("%d-%d" % (row, col) for row in range(9) for col in range(9))
+    pairs = ("%d-%d" % (row, col)
+             for row in range(size) for col in range(size))
     output = (
-        solution[pair][0]
-        if len(solution[pair]) == 1
-        else '.'
+        (solution[pair][0]
+         if len(solution[pair]) == 1
+         else '.').rjust(width)
         for pair in pairs
     )
 
     print(board.format(*output))
 
+
+# The CSP searched by a worker process of CSP.parallel_search()
+_worker_csp = None
+
+
+def _init_worker(csp):
+    global _worker_csp
+    _worker_csp = csp
+
+
+def _search_subtree(assignment):
+    """
+    Search one subtree in a worker process of CSP.parallel_search().
+    Returns the solution, if any, the number of backtracks and, if the
+    budget of the search ran out, the reason.
+    """
+    csp = _worker_csp
+    csp.num_backtrack = 0
+    csp.num_backtrack_failed = 0
+    csp.buckets = DomainBuckets(assignment)
+    solution = reason = None
+    try:
+        solution = csp.backtrack(assignment)
+    except BudgetExceeded as e:
+        reason = e.reason
+    finally:
+        csp.buckets = None
+    return solution, csp.num_backtrack, csp.num_backtrack_failed, reason
+
+
+# Heuristics understood by CSP.backtracking_search()
+VARIABLE_HEURISTICS = ('mrv', 'mrv-degree', 'dom/wdeg')
+VALUE_HEURISTICS = ('default', 'lcv')
+SEARCH_MODES = ('chronological', 'backjumping')
+
+# Solver backends understood by CSP.backtracking_search()
+CSP_BACKENDS = ('backtracking', 'sat')
+
+# Solver backends understood by create_sudoku_solver()
+SUDOKU_BACKENDS = ('csp', 'dlx')
+
 # Possible sudoku boards
 Boards = ['easy.txt', 'hard.txt', 'medium.txt', 'veryhard.txt']
 Hard_boards = ['almostlockedset.txt', 'suedecoq.txt',
                'escargot.txt', 'artoinkala.txt']
+Large_boards = ['sixteen-easy.txt', 'sixteen-hard.txt',
+                'twentyfive-easy.txt', 'twentyfive-hard.txt']
 
 
-def main():
+def main(backend='csp'):
     # For all boards
     for board in Boards:
         print('Board ::', board)
 
         # Create the CSP for the sudoku board
-        csp = create_sudoku_csp('boards/' + board)
+        csp = create_sudoku_solver('boards/' + board, backend)
         # Find the solution if any
         solution = csp.backtracking_search()
         # And print it
@@ -356,4 +1463,4 @@ def main():
     pprint(solution)
 
 if __name__ == '__main__':
-    main()
+    main(*sys.argv[1:2])
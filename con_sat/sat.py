@@ -0,0 +1,367 @@
+#!/usr/bin/python3
+
+import heapq
+import itertools as it
+
+# Encodings understood by encode()
+ENCODINGS = ('direct', 'support')
+
+
+class CNF(object):
+
+    """
+    A CSP compiled to conjunctive normal form. Every (variable, value)
+    pair of the CSP is a boolean variable, numbered from 1, that is
+    true if the variable takes the value. Clauses are lists of non-zero
+    integers, where -v is the negation of v.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+
+        # self.literal[(i, x)] is the boolean variable of i = x, and
+        # self.pair[v] the (variable, value) pair of boolean variable v
+        self.literal = {}
+        self.pair = [None]
+
+    def new_var(self, pair):
+        self.num_vars += 1
+        self.literal[pair] = self.num_vars
+        self.pair.append(pair)
+        return self.num_vars
+
+    def decode(self, model):
+        """
+        Turn a model, a list of booleans indexed by boolean variable,
+        into an assignment as returned by CSP.backtracking_search().
+        """
+        assignment = {}
+        for v in range(1, self.num_vars + 1):
+            if model[v]:
+                var, value = self.pair[v]
+                assignment[var] = [value]
+        return assignment
+
+
+def encode(csp, encoding='direct'):
+    """
+    Compile 'csp' into a CNF. Each variable takes at least and at most
+    one value of its domain. The pairwise constraints are encoded
+    either with the 'direct' encoding, a clause forbidding every
+    illegal value pair, or the 'support' encoding, a clause per value
+    requiring one of its supporting values in the other variable.
+    Alldiff groups that must use every value also get a clause per
+    value, which is implied but helps propagation.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError('Unknown encoding %r' % encoding)
+    cnf = CNF()
+
+    for var in csp.variables:
+        lits = [cnf.new_var((var, x)) for x in csp.domains[var]]
+        cnf.clauses.append(lits)
+        for a, b in it.combinations(lits, 2):
+            cnf.clauses.append([-a, -b])
+
+    seen = set()
+    for i, j in csp.get_all_arcs():
+        Cij = csp.constraints[i][j]
+        Di, Dj = csp.domains[i], csp.domains[j]
+        if encoding == 'direct':
+            for x, y in it.product(Di, Dj):
+                if (x, y) not in Cij:
+                    clause = tuple(sorted((-cnf.literal[(i, x)],
+                                           -cnf.literal[(j, y)])))
+                    if clause not in seen:
+                        seen.add(clause)
+                        cnf.clauses.append(list(clause))
+        else:
+            for x in Di:
+                clause = [-cnf.literal[(i, x)]]
+                clause += [cnf.literal[(j, y)] for y in Dj if (x, y) in Cij]
+                cnf.clauses.append(clause)
+
+    for group in csp.all_different:
+        values = set().union(*(csp.domains[var] for var in group))
+        if len(values) == len(group):
+            for x in values:
+                cnf.clauses.append([cnf.literal[(var, x)] for var in group
+                                    if x in csp.domains[var]])
+
+    return cnf
+
+
+def luby(i):
+    """
+    The i:th element, from 1, of the Luby sequence 1 1 2 1 1 2 4 ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class CDCLSolver(object):
+
+    """
+    Conflict-driven clause learning SAT solver.
+    Unit propagation with two watched literals per clause, first UIP
+    clause learning, VSIDS variable activities with phase saving, and
+    restarts following the Luby sequence.
+    """
+
+    def __init__(self, num_vars, clauses, budget=None):
+        self.num_vars = num_vars
+        self.budget = budget
+
+        # Assignment: 1 true, -1 false, 0 unassigned
+        self.value = [0] * (num_vars + 1)
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        # self.watches[lit] lists the clauses watching literal lit,
+        # the watched literals of a clause are its first two
+        self.watches = {lit: [] for v in range(1, num_vars + 1)
+                        for lit in (v, -v)}
+        self.clauses = []
+        self.learnts = []
+
+        # VSIDS
+        self.activity = [0.0] * (num_vars + 1)
+        self.var_inc = 1.0
+        self.var_decay = 0.95
+        self.heap = [(0.0, v) for v in range(1, num_vars + 1)]
+        self.phase = [False] * (num_vars + 1)
+
+        # Restart after restart_base * luby(n) conflicts
+        self.restart_base = 100
+
+        # Statistics
+        self.decisions = 0
+        self.conflicts = 0
+        self.propagations = 0
+
+        self.ok = True
+        for clause in clauses:
+            if not self.add_clause(list(clause)):
+                self.ok = False
+                break
+
+    def lit_value(self, lit):
+        v = self.value[abs(lit)]
+        return v if lit > 0 else -v
+
+    def add_clause(self, clause):
+        """
+        Add an input clause at decision level 0. Returns False if the
+        clause makes the formula unsatisfiable.
+        """
+        clause = list(dict.fromkeys(clause))
+        if any(-lit in clause for lit in clause):
+            return True
+        clause = [lit for lit in clause if self.lit_value(lit) != -1]
+        if any(self.lit_value(lit) == 1 for lit in clause):
+            return True
+        if len(clause) == 0:
+            return False
+        if len(clause) == 1:
+            self.enqueue(clause[0], None)
+            return self.propagate() is None
+        self.watch(clause)
+        self.clauses.append(clause)
+        return True
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, lit, reason):
+        v = abs(lit)
+        self.value[v] = 1 if lit > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Unit propagation. Returns a conflicting clause, or None.
+        """
+        while self.qhead < len(self.trail):
+            p = self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            false_lit = -p
+            watchers = self.watches[false_lit]
+            kept = []
+            conflict = None
+            n = 0
+            while n < len(watchers):
+                clause = watchers[n]
+                n += 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.lit_value(first) == 1:
+                    kept.append(clause)
+                    continue
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    if self.lit_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.lit_value(first) == -1:
+                        conflict = clause
+                        kept.extend(watchers[n:])
+                        break
+                    self.enqueue(first, clause)
+            self.watches[false_lit] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        First UIP conflict analysis. Returns the learned clause, with
+        the asserting literal first, and the level to backtrack to.
+        """
+        seen = set()
+        learnt = [None]
+        counter = 0
+        p = None
+        index = len(self.trail) - 1
+        level = len(self.trail_lim)
+        clause = conflict
+
+        while True:
+            for lit in clause:
+                if p is not None and lit == p:
+                    continue
+                v = abs(lit)
+                if v not in seen and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == level:
+                        counter += 1
+                    else:
+                        learnt.append(lit)
+            # Walk back to the next literal of the current level
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            p = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(p)]
+        learnt[0] = -p
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal of the highest remaining level second
+        best = max(range(1, len(learnt)),
+                   key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.var_inc
+        if self.activity[v] > 1e100:
+            # Rescale all activities
+            for u in range(1, self.num_vars + 1):
+                self.activity[u] *= 1e-100
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[u], u)
+                         for u in range(1, self.num_vars + 1)
+                         if self.value[u] == 0]
+            heapq.heapify(self.heap)
+        elif self.value[v] == 0:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def cancel_until(self, level):
+        """
+        Undo all assignments above decision level 'level'.
+        """
+        if len(self.trail_lim) <= level:
+            return
+        for k in range(len(self.trail) - 1, self.trail_lim[level] - 1, -1):
+            v = abs(self.trail[k])
+            self.phase[v] = self.trail[k] > 0
+            self.value[v] = 0
+            self.reason[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick_branch(self):
+        """
+        The unassigned variable with the highest activity, or None.
+        Heap entries are dropped lazily when assigned or outdated.
+        """
+        while self.heap:
+            act, v = heapq.heappop(self.heap)
+            if self.value[v] == 0 and -act == self.activity[v]:
+                return v
+        for v in range(1, self.num_vars + 1):
+            if self.value[v] == 0:
+                return v
+        return None
+
+    def solve(self):
+        """
+        Returns a model, a list of booleans indexed by variable, or
+        None if the formula is unsatisfiable.
+        """
+        if not self.ok:
+            return None
+
+        restarts = 1
+        limit = self.restart_base * luby(restarts)
+        since_restart = 0
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                since_restart += 1
+                if len(self.trail_lim) == 0:
+                    return None
+                learnt, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.watch(learnt)
+                    self.learnts.append(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.var_inc /= self.var_decay
+
+                if since_restart >= limit:
+                    restarts += 1
+                    limit = self.restart_base * luby(restarts)
+                    since_restart = 0
+                    self.cancel_until(0)
+                continue
+
+            v = self.pick_branch()
+            if v is None:
+                return [None] + [self.value[u] == 1
+                                 for u in range(1, self.num_vars + 1)]
+
+            if self.budget is not None:
+                self.budget.check()
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(v if self.phase[v] else -v, None)
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+
+
+class CSPSession(object):
+
+    """
+    Incremental solving of a CSP under changing clues.
+    The session keeps the arc-consistent domains of the CSP together
+    with the current clues, where a clue fixes a variable to a single
+    value. Adding or removing a clue only re-propagates the arcs it
+    affects. Every pruned domain is explained by the set of clues that
+    caused the pruning, so removing a clue restores exactly the domains
+    that depended on it before propagating again.
+    """
+
+    def __init__(self, csp):
+        self.csp = csp
+
+        # self.clues[i] is the value variable i is fixed to
+        self.clues = {}
+
+        # self.state is the arc-consistent assignment under the clues,
+        # and self.explain[i] the set of clues explaining the values
+        # pruned from the domain of i, as in CSP.backjump()
+        self.state = None
+        self.explain = None
+
+        # The set of clues explaining why the clues can not all hold,
+        # or None if they can
+        self.conflict = None
+
+        self.rebuild()
+
+    @property
+    def consistent(self):
+        return self.conflict is None
+
+    def rebuild(self):
+        """
+        Propagate all clues from scratch.
+        """
+        csp = self.csp
+        self.state = {var: list(domain)
+                      for var, domain in csp.domains.items()}
+        self.explain = {var: frozenset() for var in self.state}
+        for var, value in self.clues.items():
+            self.state[var] = [value] if value in csp.domains[var] else []
+            self.explain[var] = frozenset((var,))
+
+        self.conflict = None
+        empty = [var for var in self.clues if len(self.state[var]) == 0]
+        if len(empty) != 0:
+            self.conflict = frozenset(empty)
+        elif not csp.inference(self.state, csp.get_all_arcs(),
+                               explain=self.explain):
+            self.conflict = csp.last_conflict
+        return self.consistent
+
+    def add_clue(self, var, value):
+        """
+        Fix 'var' to 'value' and propagate. Returns True if the clues
+        are still consistent.
+        """
+        if var in self.clues:
+            self.remove_clue(var)
+        self.clues[var] = value
+
+        if not self.consistent:
+            # The domains are not at a fixpoint after a failure
+            return self.rebuild()
+
+        if value not in self.state[var]:
+            self.conflict = self.explain[var] | {var}
+            return False
+
+        self.state[var] = [value]
+        self.explain[var] = frozenset((var,))
+        self.propagate({var})
+        return self.consistent
+
+    def remove_clue(self, var):
+        """
+        Unfix 'var', restore the values pruned because of it and
+        propagate. Returns True if the clues are consistent.
+        """
+        del self.clues[var]
+        if not self.consistent:
+            return self.rebuild()
+
+        # Restore every domain whose pruning depended on the clue
+        restored = {i for i, causes in self.explain.items() if var in causes}
+        for i in restored:
+            if i in self.clues:
+                self.state[i] = [self.clues[i]]
+                self.explain[i] = frozenset((i,))
+            else:
+                self.state[i] = list(self.csp.domains[i])
+                self.explain[i] = frozenset()
+
+        self.propagate(restored)
+        return self.consistent
+
+    def propagate(self, variables):
+        """
+        Revisit the arcs to and from 'variables', and everything their
+        changes lead to.
+        """
+        csp = self.csp
+        queue = []
+        for i in sorted(variables, key=csp.order.__getitem__):
+            for k, _ in csp.get_all_neighboring_arcs(i):
+                queue.append((i, k))
+                queue.append((k, i))
+
+        if not csp.inference(self.state, queue, explain=self.explain):
+            self.conflict = csp.last_conflict
+
+    def domains(self):
+        """
+        A copy of the current arc-consistent domains.
+        """
+        return dict(self.state)
+
+    def solve(self, variable_heuristic='mrv', value_heuristic='default'):
+        """
+        Resume the search from the propagated domains. Returns the
+        solution, or None if the clues can not be completed.
+        """
+        if not self.consistent:
+            return None
+        return self.csp.search_from(
+            dict(self.state), variable_heuristic, value_heuristic)
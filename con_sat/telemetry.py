@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+
+import contextlib
+import time
+
+
+class SearchStats(object):
+
+    """
+    Propagation and search counters of a CSP solver run.
+    Nothing is recorded until the stats are attached to a CSP, and a
+    CSP without stats attached pays only for a few 'is None' checks.
+    While attached, the solver methods being timed are wrapped on the
+    CSP instance, so the solver code itself is left untouched:
+
+        stats = SearchStats()
+        with stats.recording(csp):
+            csp.backtracking_search()
+        print(stats)
+
+    'on_node' is an optional callback, called as
+    on_node(csp, assignment, depth) for every search node.
+    """
+
+    def __init__(self, on_node=None):
+        self.on_node = on_node
+
+        # Search counters
+        self.nodes = 0
+        self.max_depth = 0
+
+        # Propagation counters
+        self.revise_calls = 0
+        self.arcs_enqueued = 0
+
+        # self.values_pruned[phase][propagator] is the number of values
+        # pruned by 'arc' consistency or 'alldiff' filtering, in the
+        # 'root' propagation or during the 'search'
+        self.values_pruned = {'root': {'arc': 0, 'alldiff': 0},
+                              'search': {'arc': 0, 'alldiff': 0}}
+        self.phase = 'root'
+
+        # Seconds spent in each of the timed solver methods
+        self.time = {'inference': 0.0,
+                     'select_unassigned_variable': 0.0,
+                     'copy_assignment': 0.0}
+
+        self.csp = None
+        self.originals = {}
+
+    def node(self, csp, assignment, depth):
+        """
+        Record a search node, called by CSP.visit().
+        """
+        self.phase = 'search'
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.on_node is not None:
+            self.on_node(csp, assignment, depth)
+
+    def attach(self, csp):
+        """
+        Start recording the solver runs of 'csp'.
+        """
+        if self.csp is not None:
+            raise ValueError('SearchStats already attached')
+        self.csp = csp
+        self.phase = 'root'
+        csp.stats = self
+
+        for name in self.time:
+            self.wrap(name, self.timed(name, getattr(csp, name)))
+        self.wrap('revise', self.counted_revise(csp.revise))
+        self.wrap('filter_all_different',
+                  self.counted_filter(csp.filter_all_different))
+
+    def detach(self):
+        """
+        Stop recording, and restore the solver methods of the CSP.
+        """
+        for name in self.originals:
+            delattr(self.csp, name)
+        self.originals = {}
+        self.csp.stats = None
+        self.csp = None
+
+    @contextlib.contextmanager
+    def recording(self, csp):
+        """
+        Context manager attaching the stats to 'csp' for its duration.
+        """
+        self.attach(csp)
+        try:
+            yield self
+        finally:
+            self.detach()
+
+    def wrap(self, name, wrapper):
+        self.originals[name] = getattr(self.csp, name)
+        setattr(self.csp, name, wrapper)
+
+    def timed(self, name, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.time[name] += time.perf_counter() - start
+        return wrapper
+
+    def counted_revise(self, revise):
+        def wrapper(assignment, i, j):
+            self.revise_calls += 1
+            before = len(assignment[i])
+            revised = revise(assignment, i, j)
+            if revised:
+                self.values_pruned[self.phase]['arc'] += \
+                    before - len(assignment[i])
+            return revised
+        return wrapper
+
+    def counted_filter(self, filter_all_different):
+        def wrapper(assignment, variables):
+            before = sum(len(assignment[var]) for var in variables)
+            pruned = filter_all_different(assignment, variables)
+            if pruned:
+                self.values_pruned[self.phase]['alldiff'] += before - sum(
+                    len(assignment[var]) for var in variables)
+            return pruned
+        return wrapper
+
+    def as_dict(self):
+        """
+        The counters as a dictionary, e.g. for writing JSON.
+        """
+        return {'nodes': self.nodes,
+                'max_depth': self.max_depth,
+                'revise_calls': self.revise_calls,
+                'arcs_enqueued': self.arcs_enqueued,
+                'values_pruned': {phase: dict(pruned) for phase, pruned
+                                  in self.values_pruned.items()},
+                'time': dict(self.time)}
+
+    def __repr__(self):
+        lines = [("Nodes", self.nodes),
+                 ("Max depth", self.max_depth),
+                 ("Revise calls", self.revise_calls),
+                 ("Arcs enqueued", self.arcs_enqueued)]
+        for phase, pruned in self.values_pruned.items():
+            for propagator, count in pruned.items():
+                lines.append(("Pruned " + phase + "/" + propagator, count))
+        for name, seconds in self.time.items():
+            lines.append(("Time " + name, "{:.3f}s".format(seconds)))
+
+        string = "\n   Search stats\n\n"
+        for label, value in lines:
+            string += "{:>32} = {}\n".format(label, value)
+        return string
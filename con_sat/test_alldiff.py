@@ -0,0 +1,72 @@
+import itertools
+import random
+
+import pytest
+
+import main
+
+
+def filtered(domains):
+    """
+    Filter the domains 'domains', given as a dictionary, as a single
+    Alldiff group. Returns the pruned variables and the new domains.
+    """
+    csp = main.CSP()
+    assignment = {var: list(domain) for var, domain in domains.items()}
+    pruned = csp.filter_all_different(assignment, sorted(domains))
+    return pruned, assignment
+
+
+def test_hidden_single():
+    pruned, domains = filtered({'a': [1, 2, 3], 'b': [1, 2, 3],
+                                'c': [1, 2, 3], 'd': [1, 2, 3, 4]})
+    assert pruned == {'d'}
+    assert domains['d'] == [4]
+    assert domains['a'] == domains['b'] == domains['c'] == [1, 2, 3]
+
+
+def test_naked_pair():
+    pruned, domains = filtered({'a': [1, 2], 'b': [2, 1],
+                                'c': [1, 2, 3, 5], 'd': [1, 2, 3, 4, 5]})
+    assert pruned == {'c', 'd'}
+    assert domains == {'a': [1, 2], 'b': [2, 1],
+                       'c': [3, 5], 'd': [3, 4, 5]}
+
+
+def test_pigeonhole():
+    pruned, _ = filtered({'a': [1, 2], 'b': [1, 2], 'c': [2, 1],
+                          'd': [1, 2, 3, 4]})
+    assert pruned is None
+
+
+def test_nothing_to_prune():
+    pruned, domains = filtered({'a': [1, 2], 'b': [2, 3], 'c': [3, 1]})
+    assert pruned == set()
+    assert domains == {'a': [1, 2], 'b': [2, 3], 'c': [3, 1]}
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_filtering_is_complete(seed):
+    # A value is kept exactly when some assignment of distinct values
+    # to the whole group uses it
+    rng = random.Random(seed)
+    variables = rng.randint(2, 5)
+    values = list(range(rng.randint(variables - 1, variables + 2)))
+    domains = {'v%d' % i: sorted(rng.sample(
+        values, rng.randint(1, min(3, len(values)))))
+        for i in range(variables)}
+
+    names = sorted(domains)
+    supported = {var: set() for var in names}
+    for choice in itertools.product(*(domains[var] for var in names)):
+        if len(set(choice)) == len(choice):
+            for var, value in zip(names, choice):
+                supported[var].add(value)
+
+    pruned, result = filtered(domains)
+    if not any(supported.values()):
+        assert pruned is None
+        return
+    assert {var: set(domain) for var, domain in result.items()} == supported
+    assert pruned == {var for var in names
+                      if len(result[var]) != len(domains[var])}
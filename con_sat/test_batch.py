@@ -0,0 +1,69 @@
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import batch
+import main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BOARDS = os.path.join(HERE, 'boards')
+
+UNSOLVABLE = '11' + '0' * 79
+
+
+def puzzle_line(board):
+    rows = main.read_sudoku_board(os.path.join(BOARDS, board))
+    return ''.join(''.join(row) for row in rows)
+
+
+def solution_line(board):
+    solution = main.create_sudoku_csp(
+        os.path.join(BOARDS, board)).backtracking_search(verbose=False)
+    return ''.join(solution['%d-%d' % (row, col)][0]
+                   for row in range(9) for col in range(9))
+
+
+def test_read_puzzles():
+    stream = io.StringIO('\n' + '.' * 81 + '\n\n' + '1' * 81 + '\n')
+    assert list(batch.read_puzzles(stream)) == ['0' * 81, '1' * 81]
+    with pytest.raises(ValueError):
+        list(batch.read_puzzles(io.StringIO('123\n')))
+
+
+@pytest.mark.parametrize('backend', main.SUDOKU_BACKENDS)
+@pytest.mark.parametrize('processes', [1, 2])
+def test_solve_stream(backend, processes, tmp_path):
+    boards = ['easy.txt', 'hard.txt', 'escargot.txt']
+    puzzles = [puzzle_line(board) for board in boards] + [UNSOLVABLE]
+    output, report = io.StringIO(), io.StringIO()
+    template = str(tmp_path / 'template.pickle')
+    count = batch.solve_stream(iter(puzzles), output, processes, report,
+                               template_path=template, backend=backend)
+    assert count == len(puzzles)
+    lines = output.getvalue().split('\n')
+    assert lines == [solution_line(board) for board in boards] + ['', '']
+    assert 'Solved 4 puzzles' in report.getvalue()
+
+
+@pytest.mark.parametrize('backend', main.SUDOKU_BACKENDS)
+def test_time_limit_marks_puzzles(backend):
+    output = io.StringIO()
+    batch.solve_stream(iter([puzzle_line('artoinkala.txt')]), output,
+                       report=io.StringIO(), backend=backend, max_time=0)
+    assert output.getvalue() == batch.UNKNOWN + '\n'
+
+
+@pytest.mark.parametrize('backend', main.SUDOKU_BACKENDS)
+def test_command_line(backend, tmp_path):
+    infile = tmp_path / 'puzzles.txt'
+    infile.write_text(puzzle_line('easy.txt') + '\n' + UNSOLVABLE + '\n')
+    outfile = tmp_path / 'solutions.txt'
+    process = subprocess.run(
+        [sys.executable, os.path.join(HERE, 'batch.py'), str(infile),
+         '-o', str(outfile), '-j', '2', '-b', backend, '-T', '60'],
+        cwd=HERE, capture_output=True, text=True, check=True)
+    assert outfile.read_text() == solution_line('easy.txt') + '\n\n'
+    assert 'Solved 2 puzzles' in process.stderr
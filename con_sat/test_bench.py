@@ -0,0 +1,65 @@
+import pytest
+
+import bench
+
+
+def record(status='SOLVED', backtracks=10, wall_time=1.0):
+    return {'status': status, 'backtracks': backtracks,
+            'build_time': 0.0, 'solve_time': wall_time,
+            'wall_time': wall_time}
+
+
+def regressions(new, old, tolerance=bench.TIME_TOLERANCE):
+    return bench.compare({'dlx': {'easy.txt': new}},
+                         {'dlx': {'easy.txt': old}}, tolerance)
+
+
+def test_same_results():
+    assert regressions(record(), record()) == []
+
+
+def test_improvements():
+    assert regressions(record(backtracks=5, wall_time=0.5), record()) == []
+
+
+def test_status_change():
+    assert regressions(record('TIMEOUT'), record()) == \
+        ['dlx easy.txt: status SOLVED -> TIMEOUT']
+
+
+def test_more_backtracks():
+    assert regressions(record(backtracks=11), record()) == \
+        ['dlx easy.txt: backtracks 10 -> 11']
+
+
+@pytest.mark.parametrize('base, inside, outside', [
+    # Over TIME_SLACK, the relative tolerance decides
+    (1.0, 1.24, 1.26),
+    # Under TIME_SLACK, a few milliseconds of noise are allowed
+    (0.004, 0.0089, 0.0091),
+])
+def test_slowdown(base, inside, outside):
+    assert regressions(record(wall_time=inside),
+                       record(wall_time=base)) == []
+    assert regressions(record(wall_time=outside),
+                       record(wall_time=base)) == \
+        ['dlx easy.txt: wall time {:.4f}s -> {:.4f}s'.format(base, outside)]
+
+
+def test_tolerance():
+    assert regressions(record(wall_time=1.4), record(wall_time=1.0),
+                       tolerance=0.5) == []
+    assert len(regressions(record(wall_time=1.4), record(wall_time=1.0),
+                           tolerance=0.3)) == 1
+
+
+def test_every_regression_is_reported():
+    assert len(regressions(record('TIMEOUT', 20, 2.0), record())) == 3
+
+
+def test_missing_from_the_baseline():
+    results = {'dlx': {'easy.txt': record('TIMEOUT')},
+               'csp-mrv': {'easy.txt': record('TIMEOUT')}}
+    baseline = {'dlx': {'hard.txt': record()}}
+    assert bench.compare(results, baseline) == []
+    assert bench.compare(results, {}) == []
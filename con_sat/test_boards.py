@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import main
+from test_dlx import is_sudoku_solution
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+
+def write_board(tmp_path, rows):
+    path = tmp_path / 'board.txt'
+    path.write_text(''.join(row + '\n' for row in rows))
+    return str(path)
+
+
+def numbers(board):
+    """
+    The rows of 'board' in the whitespace separated number format.
+    """
+    symbols = main.sudoku_symbols(len(board))
+    return [' '.join('0' if c == '0' else str(symbols.index(c) + 1)
+                     for c in row)
+            for row in board]
+
+
+@pytest.mark.parametrize('board', ['easy.txt', 'sixteen-easy.txt',
+                                   'twentyfive-easy.txt'])
+def test_number_format(tmp_path, board):
+    grid = main.read_sudoku_board(os.path.join(BOARDS, board))
+    # Blank lines and padding are ignored
+    rows = ['  ' + row + ' ' for row in numbers(grid)]
+    rows.insert(len(rows) // 2, '')
+    assert main.read_sudoku_board(write_board(tmp_path, rows)) == grid
+
+
+def test_dots_are_empty(tmp_path):
+    rows = ['1.3.', '.4..', '....', '.2.1']
+    assert main.read_sudoku_board(write_board(tmp_path, rows)) == \
+        [[c.replace('.', '0') for c in row] for row in rows]
+
+
+def test_numbers_past_nine(tmp_path):
+    rows = ['0 ' * 15 + str(value) for value in range(1, 17)]
+    board = main.read_sudoku_board(write_board(tmp_path, rows))
+    assert [row[-1] for row in board] == main.sudoku_symbols(16)
+
+
+@pytest.mark.parametrize('rows', [
+    ['1234', '3412', '2143'],
+    ['1234', '341', '2143', '4321'],
+    ['1 2 3 4', '3 4 1 2', '2 1 4', '4 3 2 1'],
+    ['1234', '3412', '2145', '4321'],
+    ['1234', '3412', '21X3', '4321'],
+    ['1 2 3 4', '3 4 1 2', '2 1 4 5', '4 3 2 1'],
+    ['1 2 3 4', '3 4 1 2', '2 1 4 -3', '4 3 2 1'],
+    ['1 2 3 4', '3 4 1 2', '2 1 4 x', '4 3 2 1'],
+])
+def test_bad_boards(tmp_path, rows):
+    with pytest.raises(ValueError):
+        main.read_sudoku_board(write_board(tmp_path, rows))
+
+
+def test_print_large_solution(capsys):
+    filename = os.path.join(BOARDS, 'sixteen-easy.txt')
+    solution = main.create_sudoku_solver(filename, 'dlx') \
+        .backtracking_search(verbose=False)
+    main.print_sudoku_solution(solution)
+    lines = capsys.readouterr().out.splitlines()
+
+    assert len(lines) == 16 + 3
+    assert len({len(line) for line in lines}) == 1
+    assert [k for k, line in enumerate(lines) if '-+-' in line] == \
+        [4, 9, 14]
+    board = [line.replace('|', '').split() for line in lines
+             if '-+-' not in line]
+    assert board == [[solution['%d-%d' % (row, col)][0]
+                      for col in range(16)] for row in range(16)]
+
+
+def test_print_unsolved_cells(capsys):
+    solution = {'%d-%d' % (row, col): ['1', '2']
+                for row in range(4) for col in range(4)}
+    solution['0-0'] = ['3']
+    main.print_sudoku_solution(solution)
+    assert capsys.readouterr().out.splitlines() == [
+        '3 . | . .', '. . | . .', '----+----',
+        '. . | . .', '. . | . .']
+
+
+@pytest.mark.parametrize('board', main.Large_boards)
+def test_csp_solves_large_boards(board):
+    filename = os.path.join(BOARDS, board)
+    solution = main.create_sudoku_csp(filename).backtracking_search(
+        verbose=False)
+    assert is_sudoku_solution(main.read_sudoku_board(filename), solution)
@@ -0,0 +1,132 @@
+import multiprocessing as mp
+import os
+import threading
+
+import pytest
+
+import budget
+import main
+from budget import BudgetExceeded, SearchBudget
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+
+def sudoku(board='escargot.txt'):
+    return main.create_sudoku_csp(os.path.join(BOARDS, board))
+
+
+def unsatisfiable():
+    return main.get_sudoku_template(4).with_domains({'0-0': ['1'],
+                                                     '0-3': ['1']})
+
+
+def test_solve_within_budget():
+    expected = sudoku().backtracking_search(verbose=False)
+    result = sudoku().solve(SearchBudget(max_nodes=100000, max_time=60))
+    assert result.status == 'solved'
+    assert result.reason is None
+    assert result.solution == expected
+    assert result.nodes == result.num_backtrack > 0
+
+
+def test_solve_unsatisfiable():
+    result = unsatisfiable().solve()
+    assert result.status == 'unsatisfiable'
+    assert result.solution is None
+
+
+@pytest.mark.parametrize('search', main.SEARCH_MODES)
+def test_node_budget(search):
+    csp = sudoku()
+    result = csp.solve(SearchBudget(max_nodes=5), search=search)
+    assert result.status == 'unknown'
+    assert result.reason == 'nodes'
+    assert result.solution is None
+    assert result.nodes == 6
+    assert csp.budget is None and csp.buckets is None
+
+
+def test_node_budget_sat():
+    result = sudoku().solve(SearchBudget(max_nodes=5), backend='sat')
+    assert result.status == 'unknown'
+    assert result.reason == 'nodes'
+
+
+def test_node_budget_dlx():
+    board = main.read_sudoku_board(os.path.join(BOARDS, 'escargot.txt'))
+    solver = main.SudokuExactCover(board, main.sudoku_symbols(9))
+    result = solver.solve(SearchBudget(max_nodes=5))
+    assert result.status == 'unknown'
+    assert result.reason == 'nodes'
+    assert solver.solve().status == 'solved'
+
+
+@pytest.mark.parametrize('reason', ['time', 'cancelled'])
+def test_budget_checked_in_root_propagation(reason):
+    # Both limits are hit before the first search node, so only the
+    # polls of the first AC-3 run can notice them
+    cancel = threading.Event()
+    cancel.set()
+    if reason == 'time':
+        limits = SearchBudget(max_time=0, check_every=1)
+    else:
+        limits = SearchBudget(cancel=cancel, check_every=1)
+    result = sudoku().solve(limits)
+    assert result.status == 'unknown'
+    assert result.reason == reason
+    assert result.nodes == 0
+
+
+def test_memory_budget_is_relative_to_start(monkeypatch):
+    memory = [8 << 30]
+    monkeypatch.setattr(budget, 'current_memory', lambda: memory[0])
+
+    # A large process that does not grow stays within the budget
+    limits = SearchBudget(max_memory=1 << 20, check_every=1)
+    assert sudoku().solve(limits).status == 'solved'
+
+    def grow():
+        memory[0] += 1 << 20
+        return memory[0]
+    monkeypatch.setattr(budget, 'current_memory', grow)
+    result = sudoku().solve(limits)
+    assert result.status == 'unknown'
+    assert result.reason == 'memory'
+
+
+def test_check_every():
+    limits = SearchBudget(max_time=0, check_every=4)
+    limits.start()
+    for _ in range(3):
+        limits.check()
+    with pytest.raises(BudgetExceeded) as e:
+        limits.check()
+    assert e.value.reason == 'time'
+
+
+def test_parallel_node_budget():
+    csp = sudoku('artoinkala.txt')
+    with pytest.raises(BudgetExceeded) as e:
+        csp.parallel_search(processes=2, verbose=False,
+                            budget=SearchBudget(max_nodes=3))
+    assert e.value.reason == 'nodes'
+    assert csp.budget is None
+
+
+def test_parallel_cancel():
+    cancel = mp.Event()
+    cancel.set()
+    with pytest.raises(BudgetExceeded) as e:
+        sudoku().parallel_search(
+            processes=2, verbose=False,
+            budget=SearchBudget(cancel=cancel, check_every=1))
+    assert e.value.reason == 'cancelled'
+
+
+def test_parallel_search_solves():
+    expected = sudoku().backtracking_search(verbose=False)
+    csp = sudoku()
+    solution = csp.parallel_search(processes=2, verbose=False,
+                                   budget=SearchBudget(max_time=60))
+    assert solution == expected
+    assert csp.num_backtrack > 0
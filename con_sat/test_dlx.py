@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+import main
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+# Search nodes of the dancing links backend, a regression in the column
+# choice shows up as more nodes long before it shows up in the timings
+DLX_NODES = {'easy.txt': 82,
+             'escargot.txt': 169,
+             'artoinkala.txt': 1493,
+             'sixteen-easy.txt': 372,
+             'sixteen-hard.txt': 262}
+
+
+def solve(board, backend):
+    solver = main.create_sudoku_solver(os.path.join(BOARDS, board), backend)
+    return solver, solver.backtracking_search(verbose=False)
+
+
+def is_sudoku_solution(board, solution):
+    size = len(board)
+    box = int(size ** 0.5)
+    symbols = set(main.sudoku_symbols(size))
+    cell = {(row, col): solution['%d-%d' % (row, col)]
+            for row in range(size) for col in range(size)}
+    if any(len(values) != 1 for values in cell.values()):
+        return False
+    units = [[(row, col) for col in range(size)] for row in range(size)]
+    units += [[(row, col) for row in range(size)] for col in range(size)]
+    units += [[(r + row, c + col) for row in range(box) for col in range(box)]
+              for r in range(0, size, box) for c in range(0, size, box)]
+    for unit in units:
+        if {cell[k][0] for k in unit} != symbols:
+            return False
+    return all(board[row][col] in ('0', cell[(row, col)][0])
+               for row in range(size) for col in range(size))
+
+
+@pytest.mark.parametrize('board', main.Boards + main.Hard_boards)
+def test_dlx_agrees_with_csp(board):
+    _, expected = solve(board, 'csp')
+    _, solution = solve(board, 'dlx')
+    assert solution == expected
+
+
+@pytest.mark.parametrize('board', sorted(DLX_NODES))
+def test_dlx_node_counts(board):
+    solver, solution = solve(board, 'dlx')
+    grid = main.read_sudoku_board(os.path.join(BOARDS, board))
+    assert is_sudoku_solution(grid, solution)
+    assert solver.num_backtrack <= DLX_NODES[board]
+
+
+def test_dlx_fails_on_contradicting_clues():
+    board = [['0'] * 4 for _ in range(4)]
+    board[0][0] = board[0][3] = '1'
+    solver = main.SudokuExactCover(board, main.sudoku_symbols(4))
+    assert solver.backtracking_search(verbose=False) is None
@@ -0,0 +1,87 @@
+import os
+import random
+
+import pytest
+
+import main
+from heuristics import DomainBuckets
+from test_dlx import is_sudoku_solution
+from test_search import SEEDS, all_solutions, is_solution, random_csp
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+HEURISTICS = [(variable, value) for variable in main.VARIABLE_HEURISTICS
+              for value in main.VALUE_HEURISTICS]
+
+
+@pytest.mark.parametrize('variable, value', HEURISTICS)
+@pytest.mark.parametrize('board', main.Boards + main.Hard_boards)
+def test_heuristics_solve_boards(board, variable, value):
+    filename = os.path.join(BOARDS, board)
+    solution = main.create_sudoku_csp(filename).backtracking_search(
+        variable, value, verbose=False)
+    assert is_sudoku_solution(main.read_sudoku_board(filename), solution)
+
+
+@pytest.mark.parametrize('variable, value', HEURISTICS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_heuristics_on_random_csps(seed, variable, value):
+    csp = random_csp(seed)
+    solution = csp.backtracking_search(variable, value, verbose=False)
+    assert (solution is not None) == bool(all_solutions(csp))
+    if solution is not None:
+        assert is_solution(csp, solution)
+
+
+def test_unknown_heuristics():
+    csp = random_csp(0)
+    with pytest.raises(ValueError):
+        csp.backtracking_search('degree', verbose=False)
+    with pytest.raises(ValueError):
+        csp.backtracking_search('mrv', 'random', verbose=False)
+
+
+def snapshot(buckets):
+    # The order within a bucket may change, the variable selection
+    # breaks ties by the variable order
+    return (dict(buckets.size),
+            {n: set(bucket) for n, bucket in buckets.buckets.items()
+             if bucket},
+            len(buckets))
+
+
+def test_buckets_track_sizes():
+    buckets = DomainBuckets({'a': [1], 'b': [1, 2], 'c': [1, 2, 3],
+                             'd': [1, 2]})
+    assert len(buckets) == 3
+    assert list(buckets.smallest()) == ['b', 'd']
+    buckets.update('c', 1)
+    buckets.update('d', 1)
+    assert list(buckets.undecided()) == ['b']
+    buckets.update('b', 1)
+    assert buckets.smallest() is None and len(buckets) == 0
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_buckets_undo(seed):
+    rng = random.Random(seed)
+    assignment = {'v%d' % i: list(range(rng.randint(1, 6)))
+                  for i in range(12)}
+    buckets = DomainBuckets(assignment)
+
+    # Shrink the domains along a random path, undoing random suffixes
+    stack = []
+    for _ in range(200):
+        if stack and rng.random() < 0.3:
+            mark, state = stack.pop()
+            buckets.undo(mark)
+            assert snapshot(buckets) == state
+            continue
+        stack.append((buckets.mark(), snapshot(buckets)))
+        for var in rng.sample(sorted(buckets.size), 3):
+            buckets.update(var, rng.randint(1, buckets.size[var]))
+    while stack:
+        mark, state = stack.pop()
+        buckets.undo(mark)
+        assert snapshot(buckets) == state
+    assert snapshot(buckets) == snapshot(DomainBuckets(assignment))
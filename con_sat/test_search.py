@@ -0,0 +1,215 @@
+import itertools
+import os
+import random
+
+import pytest
+
+import main
+import sat
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+SEEDS = range(40)
+
+
+def random_csp(seed, variables=8, values=3, density=0.5, tightness=0.35):
+    """
+    A random binary CSP, where each pair of variables is constrained
+    with probability 'density' and a constraint rules out each value
+    pair with probability 'tightness'. Every other CSP also gets an
+    Alldiff group over its first three variables.
+    """
+    rng = random.Random(seed)
+    csp = main.CSP()
+    names = ['v%d' % i for i in range(variables)]
+    for name in names:
+        csp.add_variable(name, range(values))
+    for i, j in itertools.combinations(names, 2):
+        if rng.random() < density:
+            banned = {(x, y) for x in range(values) for y in range(values)
+                      if rng.random() < tightness}
+            csp.add_constraint_one_way(
+                i, j, lambda x, y, banned=banned: (x, y) not in banned)
+            csp.add_constraint_one_way(
+                j, i, lambda x, y, banned=banned: (y, x) not in banned)
+    if seed % 2:
+        csp.add_all_different_constraint(names[:3])
+    return csp
+
+
+def is_solution(csp, solution):
+    if solution is None or set(solution) != set(csp.variables):
+        return False
+    if any(len(values) != 1 for values in solution.values()):
+        return False
+    return all((solution[i][0], solution[j][0]) in Cij
+               for i in csp.variables
+               for j, Cij in csp.constraints[i].items())
+
+
+def all_solutions(csp):
+    """
+    Every solution of 'csp' by brute force, as frozensets of
+    (variable, value) pairs.
+    """
+    solutions = set()
+    for values in itertools.product(*(csp.domains[var]
+                                      for var in csp.variables)):
+        solution = {var: [x] for var, x in zip(csp.variables, values)}
+        if is_solution(csp, solution):
+            solutions.add(frozenset(zip(csp.variables, values)))
+    return solutions
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_backjumping_agrees_with_chronological(seed):
+    expected = bool(all_solutions(random_csp(seed)))
+    chronological = random_csp(seed).backtracking_search(verbose=False)
+    csp = random_csp(seed)
+    backjumping = csp.backtracking_search(verbose=False,
+                                          search='backjumping')
+    assert (chronological is not None) == expected
+    assert (backjumping is not None) == expected
+    if expected:
+        assert is_solution(csp, backjumping)
+
+
+@pytest.mark.parametrize('board', ['easy.txt', 'hard.txt', 'escargot.txt'])
+def test_backjumping_solves_sudoku(board):
+    filename = os.path.join(BOARDS, board)
+    expected = main.create_sudoku_csp(filename).backtracking_search(
+        verbose=False)
+    solution = main.create_sudoku_csp(filename).backtracking_search(
+        verbose=False, search='backjumping')
+    assert solution == expected
+
+
+def test_unknown_search_mode():
+    with pytest.raises(ValueError):
+        random_csp(0).backtracking_search(verbose=False, search='dfs')
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_iter_solutions_finds_every_solution(seed):
+    csp = random_csp(seed)
+    found = [frozenset((var, values[0]) for var, values in solution.items())
+             for solution in csp.iter_solutions()]
+    assert len(found) == len(set(found))
+    assert set(found) == all_solutions(csp)
+    assert csp.buckets is None
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_count_solutions(seed):
+    csp = random_csp(seed)
+    expected = len(all_solutions(csp))
+    assert csp.count_solutions() == expected
+    assert csp.count_solutions(limit=2) == min(expected, 2)
+    assert csp.buckets is None
+
+
+def test_iter_solutions_stops_early():
+    csp = random_csp(0)
+    solutions = csp.iter_solutions()
+    first = next(solutions)
+    assert is_solution(csp, first)
+    solutions.close()
+    assert csp.buckets is None
+    # The CSP can be searched again after the generator is closed
+    assert csp.count_solutions() == len(all_solutions(csp))
+
+
+def test_unique_sudoku_solution():
+    csp = main.create_sudoku_csp(os.path.join(BOARDS, 'easy.txt'))
+    assert csp.count_solutions(limit=2) == 1
+
+
+@pytest.mark.parametrize('encoding', sat.ENCODINGS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_sat_agrees_with_chronological(seed, encoding):
+    expected = random_csp(seed).backtracking_search(verbose=False)
+    csp = random_csp(seed)
+    solution = csp.backtracking_search(verbose=False, backend='sat',
+                                       encoding=encoding)
+    assert (solution is not None) == (expected is not None)
+    if solution is not None:
+        assert is_solution(csp, solution)
+
+
+@pytest.mark.parametrize('encoding', sat.ENCODINGS)
+def test_sat_solves_sudoku(encoding):
+    filename = os.path.join(BOARDS, 'hard.txt')
+    expected = main.create_sudoku_csp(filename).backtracking_search(
+        verbose=False)
+    solution = main.create_sudoku_csp(filename).backtracking_search(
+        verbose=False, backend='sat', encoding=encoding)
+    assert solution == expected
+
+
+def test_luby():
+    assert [sat.luby(i) for i in range(1, 16)] == \
+        [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        sat.encode(random_csp(0), 'log')
+
+
+def random_coloring(seed, vertices=9, colors=3, density=0.45):
+    """
+    A random graph coloring CSP, where each pair of vertices is joined
+    with probability 'density'.
+    """
+    rng = random.Random(seed)
+    csp = main.CSP()
+    names = ['v%d' % i for i in range(vertices)]
+    for name in names:
+        csp.add_variable(name, range(colors))
+    for i, j in itertools.combinations(names, 2):
+        if rng.random() < density:
+            csp.add_constraint_one_way(i, j, lambda x, y: x != y)
+            csp.add_constraint_one_way(j, i, lambda x, y: x != y)
+    return csp
+
+
+def test_symmetry_breaking_counts_classes():
+    csp = main.create_map_coloring_csp()
+    assert csp.count_solutions() == 18
+    csp.break_value_symmetry()
+    # The mainland takes all three colors, Tasmania one of them
+    assert csp.count_solutions() == 3
+    csp.break_value_symmetry(False)
+    assert csp.count_solutions() == 18
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_symmetry_breaking_agrees(seed):
+    expected = random_coloring(seed).backtracking_search(verbose=False)
+    for search in main.SEARCH_MODES:
+        csp = random_coloring(seed)
+        csp.break_value_symmetry()
+        solution = csp.backtracking_search(verbose=False, search=search)
+        assert (solution is None) == (expected is None)
+        if solution is not None:
+            assert is_solution(csp, solution)
+
+
+def test_symmetry_breaking_finds_unsatisfiable():
+    # Enough of the random colorings have no solution to matter
+    unsatisfiable = [seed for seed in SEEDS
+                     if random_coloring(seed).count_solutions() == 0]
+    assert len(unsatisfiable) >= 10
+
+
+def test_symmetry_breaking_needs_interchangeable_values():
+    csp = main.create_map_coloring_csp()
+    csp.add_variable('X', ['red', 'green'])
+    with pytest.raises(ValueError):
+        csp.break_value_symmetry()
+
+    csp = main.create_map_coloring_csp()
+    csp.add_constraint_one_way('WA', 'T', lambda x, y: x < y)
+    with pytest.raises(ValueError):
+        csp.break_value_symmetry()
+    assert not csp.interchangeable_values
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+import main
+from session import CSPSession
+from test_search import SEEDS, is_solution, random_csp
+
+
+def fresh_session(csp, clues):
+    session = CSPSession(csp)
+    session.clues = dict(clues)
+    session.rebuild()
+    return session
+
+
+def check_session(session):
+    """
+    Compare 'session' with a session propagating its clues from
+    scratch.
+    """
+    fresh = fresh_session(session.csp, session.clues)
+    assert session.consistent == fresh.consistent
+    if not session.consistent:
+        assert session.solve() is None
+        return
+    # Arc consistency has a unique fixpoint
+    assert ({var: sorted(domain) for var, domain in session.state.items()}
+            == {var: sorted(domain) for var, domain in fresh.state.items()})
+    solution = session.solve()
+    assert (solution is None) == (fresh.solve() is None)
+    if solution is not None:
+        assert is_solution(session.csp, solution)
+        for var, value in session.clues.items():
+            assert solution[var] == [value]
+
+
+def edit_clues(session, rng, edits):
+    csp = session.csp
+    for _ in range(edits):
+        if session.clues and rng.random() < 0.4:
+            session.remove_clue(rng.choice(sorted(session.clues)))
+        else:
+            var = rng.choice(csp.variables)
+            session.add_clue(var, rng.choice(csp.domains[var]))
+        check_session(session)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_session_matches_rebuild(seed):
+    session = CSPSession(random_csp(seed))
+    check_session(session)
+    edit_clues(session, random.Random(seed), 20)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sudoku_session_matches_rebuild(seed):
+    csp = main.get_sudoku_template(4).with_domains({})
+    session = CSPSession(csp)
+    edit_clues(session, random.Random(seed), 30)
+
+
+def test_conflicting_clues():
+    csp = main.get_sudoku_template(4).with_domains({})
+    session = CSPSession(csp)
+    assert session.add_clue('0-0', '1')
+    assert not session.add_clue('0-1', '1')
+    assert session.conflict <= {'0-0', '0-1'}
+    assert session.solve() is None
+    assert session.remove_clue('0-1')
+    assert session.solve()['0-0'] == ['1']
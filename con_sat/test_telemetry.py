@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+import main
+from telemetry import SearchStats
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+WRAPPED = ('inference', 'select_unassigned_variable', 'copy_assignment',
+           'revise', 'filter_all_different')
+
+
+def sudoku(board='escargot.txt'):
+    return main.create_sudoku_csp(os.path.join(BOARDS, board))
+
+
+def root_pruned(csp):
+    """
+    The number of values pruned by the first propagation of 'csp'.
+    """
+    before = sum(len(domain) for domain in csp.domains.values())
+    assignment = csp.prepare_search()
+    csp.buckets = None
+    return before - sum(len(domain) for domain in assignment.values())
+
+
+@pytest.mark.parametrize('search', main.SEARCH_MODES)
+def test_stats_count_the_search(search):
+    nodes = []
+    stats = SearchStats(on_node=lambda csp, assignment, depth:
+                        nodes.append(depth))
+    csp = sudoku()
+    with stats.recording(csp):
+        solution = csp.backtracking_search(verbose=False, search=search)
+
+    assert solution == sudoku().backtracking_search(verbose=False)
+    assert stats.nodes == csp.num_backtrack == len(nodes) > 1
+    assert stats.max_depth == max(nodes)
+    assert stats.revise_calls > 0
+    assert stats.arcs_enqueued >= stats.revise_calls
+
+    pruned = stats.values_pruned
+    assert pruned['root']['arc'] + pruned['root']['alldiff'] == \
+        root_pruned(sudoku())
+    assert pruned['search']['arc'] > 0 and pruned['search']['alldiff'] > 0
+    assert stats.as_dict()['values_pruned'] == pruned
+
+
+def test_detach_restores_the_methods():
+    csp = sudoku()
+    stats = SearchStats()
+    with stats.recording(csp):
+        assert all(name in csp.__dict__ for name in WRAPPED)
+        with pytest.raises(ValueError):
+            stats.attach(csp)
+    assert not any(name in csp.__dict__ for name in WRAPPED)
+    assert csp.stats is None
+
+    # Nothing is recorded once detached, also after a failed search
+    csp.backtracking_search(verbose=False)
+    assert stats.nodes == 0
+    with pytest.raises(KeyError):
+        with stats.recording(csp):
+            raise KeyError('search failed')
+    assert 'inference' not in csp.__dict__
+    assert stats.csp is None
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import main
+
+BOARDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boards')
+
+
+def snapshot(csp):
+    return (list(csp.variables), dict(csp.order),
+            {i: dict(Ci) for i, Ci in csp.constraints.items()},
+            [list(group) for group in csp.all_different],
+            {i: list(groups) for i, groups in csp.all_different_of.items()},
+            {i: list(domain) for i, domain in csp.domains.items()})
+
+
+@pytest.fixture
+def templates(monkeypatch):
+    # Every test starts without compiled templates in memory
+    monkeypatch.setattr(main, '_sudoku_templates', {})
+
+
+@pytest.mark.parametrize('board', main.Boards)
+def test_template_matches_build(board, templates):
+    rows = main.read_sudoku_board(os.path.join(BOARDS, board))
+    built = main.build_sudoku_csp(rows)
+    csp = main.sudoku_from_template(main.get_sudoku_template(), rows)
+    assert csp.backtracking_search(verbose=False) == \
+        built.backtracking_search(verbose=False)
+
+
+def test_with_domains_copies_on_write(templates):
+    template = main.get_sudoku_template(4)
+    before = snapshot(template)
+    csp = template.with_domains({'0-0': ['1']})
+    other = template.with_domains({})
+
+    csp.add_variable('extra', ['1', '2'])
+    csp.add_constraint_one_way('0-0', '0-1', lambda x, y: x < y)
+    csp.add_constraint_one_way('0-1', '0-0', lambda x, y: x > y)
+    csp.add_all_different_constraint(['extra', '3-3'])
+    assert csp.backtracking_search(verbose=False) is not None
+
+    assert snapshot(template) == before
+    assert other.variables == template.variables
+    assert 'extra' not in other.constraints['3-3']
+
+    template.add_variable('late', ['1'])
+    assert 'late' not in other.order and 'late' not in csp.order
+
+
+def test_template_cached_on_disk(tmp_path, templates):
+    path = str(tmp_path / 'template.pickle')
+    template = main.get_sudoku_template(4, path)
+    assert os.path.exists(path)
+
+    main._sudoku_templates.clear()
+    loaded = main.get_sudoku_template(4, path)
+    assert loaded is not template
+    assert loaded.variables == template.variables
+    assert main.get_sudoku_template(4) is loaded
+
+    with pytest.raises(ValueError):
+        main._sudoku_templates.clear()
+        main.get_sudoku_template(9, path)
+
+
+def test_template_in_memory_written_to_disk(tmp_path, templates):
+    template = main.get_sudoku_template(4)
+    path = str(tmp_path / 'template.pickle')
+    assert main.get_sudoku_template(4, path) is template
+    assert os.path.exists(path)
@@ -0,0 +1,53 @@
+"""
+Every project is a directory of flat modules that import each other by
+name, and some of the names, 'main' and 'telemetry' among them, are
+used by more than one project. Running pytest from the top would make
+the projects share one sys.modules, so the tests of a directory are
+collected and run with the modules of that directory only. Running
+pytest from within a project directory does not load this file.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# The modules of the projects not in use, by project directory
+_stashed = {}
+_current = None
+
+
+def _project(path):
+    """
+    The project directory holding 'path', or None outside the projects.
+    """
+    path = os.path.abspath(str(path))
+    if os.path.dirname(os.path.dirname(path)) != ROOT:
+        return None
+    return os.path.dirname(path)
+
+
+def _switch(project):
+    """
+    Make the modules of the directory 'project' the ones imported by
+    name, stashing those of the other projects.
+    """
+    global _current
+    if project is None or project == _current:
+        return
+    for name, module in list(sys.modules.items()):
+        owner = _project(getattr(module, '__file__', None) or ROOT)
+        if owner is not None and owner != project:
+            _stashed.setdefault(owner, {})[name] = sys.modules.pop(name)
+    sys.modules.update(_stashed.pop(project, {}))
+    if project in sys.path:
+        sys.path.remove(project)
+    sys.path.insert(0, project)
+    _current = project
+
+
+def pytest_collectstart(collector):
+    _switch(_project(collector.path))
+
+
+def pytest_runtest_setup(item):
+    _switch(_project(item.path))
@@ -1,27 +1,72 @@
+import random as rand
+
 import simann as sa
 
+try:
+    import numpy as np
+except ImportError:
+    # Vectorized scoring is not available
+    np = None
+
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    # Before Python 3.10
+    def popcount(v):
+        return bin(v).count('1')
+
 
 class Board(object):
 
     """
     Solution representation.
-    Represented as a list of coordinates of the eggs.
+    Represented as a bitboard, an integer with bit y * M + x set when
+    there is an egg at (x, y). The number of eggs on every row and
+    diagonal is kept up to date as eggs are moved, so a move can be
+    scored from the few lines it changes. Moves never change the
+    number of eggs in a column.
     """
 
+    # Penalty per egg too many on a line
+    STRAIGHT_PENALTY = 0.9
+    DIAG_PENALTY = 0.1
+
+    # Draws made by randomMove() before it lists the moves instead
+    MAX_DRAWS = 1000
+
     def __init__(self, M, N, K, eggs):
         self.M = M
         self.N = N
         self.K = K
         self.eggs = eggs
 
-        self.board = [(x, y) for y in range(N) for x in range(M)
-                      if y * M + x < eggs]
+        # Masks of the cells of every column, row and diagonal, where
+        # the second diagonals are indexed by x - y + N - 1, and the
+        # (row, mask) pairs of the cells of every column
+        self.xMasks = [sum(self.bit(x, y) for y in range(N))
+                       for x in range(M)]
+        self.yMasks = [sum(self.bit(x, y) for x in range(M))
+                       for y in range(N)]
+        self.columns = [[(y, self.bit(x, y)) for y in range(N)]
+                        for x in range(M)]
+        self.d1Masks = [0] * (M + N - 1)
+        self.d2Masks = [0] * (M + N - 1)
+        for y in range(N):
+            for x in range(M):
+                self.d1Masks[x + y] |= self.bit(x, y)
+                self.d2Masks[x - y + N - 1] |= self.bit(x, y)
+
+        self.setP((1 << eggs) - 1)
+
+    def bit(self, x, y):
+        return 1 << (y * self.M + x)
 
     def __repr__(self):
         string = ""
         for y in range(self.N):
             for x in range(self.M):
-                if (x, y) in self.board:
+                if self.board & self.bit(x, y):
                     string += 'X '
                 else:
                     string += '. '
@@ -30,21 +75,42 @@ class Board(object):
 
     def getP(self):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Sets new current state.
         """
         return self.board
 
     def setP(self, board):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Gets the current state.
         """
         self.board = board
+        xs, self.ys, self.ds1, self.ds2 = self.countLines(board)
+        self.straight = self.excess(xs) + self.excess(self.ys)
+        self.diag = self.excess(self.ds1) + self.excess(self.ds2)
+
+    def countLines(self, board):
+        """
+        Count the eggs of 'board' on every column, row and diagonal.
+        """
+        return ([popcount(board & mask) for mask in self.xMasks],
+                [popcount(board & mask) for mask in self.yMasks],
+                [popcount(board & mask) for mask in self.d1Masks],
+                [popcount(board & mask) for mask in self.d2Masks])
+
+    def excess(self, counts):
+        """
+        The number of eggs too many on the lines of 'counts'.
+        """
+        return sum(max(v - self.K, 0) for v in counts)
+
+    def penalty(self, straight, diag):
+        return straight * self.STRAIGHT_PENALTY + diag * self.DIAG_PENALTY
 
     def objective(self, board=None, final=False):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Returns the objective value of the given board.
         If no board is given, return the objective value of the
         current board.
@@ -52,35 +118,11 @@ class Board(object):
         simann algorithm has finished.
         """
         if board is None:
-            board = self.board
-
-        STRAIGT_PENALTY = 0.9
-        DIAG_PENALTY = 0.1
-
-        # Horizontal
-        xs = {k: 0 for k in range(self.M)}
-        # Vertical
-        ys = {k: 0 for k in range(self.N)}
-        # Diagonal
-        ds1 = {k: 0 for k in range(self.M+self.N-1)}
-        ds2 = {k: 0 for k in range(self.M+self.N-1)}
-
-        # Compute each point
-        for p in board:
-            xs[p[0]] += 1
-            ys[p[1]] += 1
-            ds1[p[0]+p[1]] += 1
-            ds2[(self.M+self.N-1)//2+p[0]-p[1]] += 1
-
-        # Calculate objective function value and return
-        cumsum = sum(map(
-            lambda ss: sum(max(v-self.K, 0) for v in ss.values()),
-            [xs, ys])
-        ) * STRAIGT_PENALTY
-        cumsum += sum(map(
-            lambda ss: sum(max(v-self.K, 0) for v in ss.values()),
-            [ds1, ds2])
-        ) * DIAG_PENALTY
+            cumsum = self.penalty(self.straight, self.diag)
+        else:
+            xs, ys, ds1, ds2 = self.countLines(board)
+            cumsum = self.penalty(self.excess(xs) + self.excess(ys),
+                                  self.excess(ds1) + self.excess(ds2))
 
         if final:
             return cumsum
@@ -89,7 +131,7 @@ class Board(object):
 
     def validSolution(self, board=None):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Checks if the given solution is a valid one.
         """
         score = self.objective()
@@ -97,25 +139,167 @@ class Board(object):
 
     def generate(self):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Generates a neighborhood of states of the current
         state on the board.
         """
-        newBoards = []
+        return [self.board ^ self.bit(x, y) ^ self.bit(x, newy)
+                for x, y, newy in self.generateMoves()]
+
+    def generateMoves(self):
+        """
+        Function used by the simann library.
+        Lazily generates the neighborhood of the current state as
+        moves (x, y, newy), moving the egg at (x, y) to the free row
+        newy of its column.
+        """
+        board = self.board
+        for x, cells in enumerate(self.columns):
+            if not board & self.xMasks[x]:
+                continue
+            eggs = [y for y, bit in cells if board & bit]
+            free = [y for y, bit in cells if not board & bit]
+            for y in eggs:
+                for newy in free:
+                    yield (x, y, newy)
+
+    def randomMove(self):
+        """
+        Function used by the simann library.
+        Returns a uniformly random move of the neighborhood, by drawing
+        cells and rows until they make a move. After MAX_DRAWS misses
+        the move is picked from generateMoves() instead, and None is
+        returned if there is no move at all.
+        """
+        for _ in range(self.MAX_DRAWS):
+            x = rand.randrange(self.M)
+            y = rand.randrange(self.N)
+            newy = rand.randrange(self.N)
+            if (self.board & self.bit(x, y) and
+                    not self.board & self.bit(x, newy)):
+                return (x, y, newy)
 
-        # For each point
-        for p in self.board:
-            # Generate all neighboring points
-            for newy in range(self.N):
-                if newy == p[1]:
-                    continue
-                newp = (p[0], newy)
-                if newp not in self.board:
-                    newboard = self.board[:]
-                    newboard[newboard.index(p)] = newp
-                    newBoards.append(newboard)
+        moves = list(self.generateMoves())
+        return rand.choice(moves) if moves else None
 
-        return newBoards
+    def scoreMove(self, move):
+        """
+        Function used by the simann library.
+        Returns the objective value of the current board after the
+        given move, without making it. Only the row and the two
+        diagonals the egg leaves and enters change their counts.
+        """
+        x, y, newy = move
+        K = self.K
+        d = self.N - 1
+
+        straight = self.straight - (self.ys[y] > K) + (self.ys[newy] >= K)
+        diag = (self.diag
+                - (self.ds1[x + y] > K) + (self.ds1[x + newy] >= K)
+                - (self.ds2[x - y + d] > K) + (self.ds2[x - newy + d] >= K))
+        return -self.penalty(straight, diag)
+
+    def apply(self, move):
+        """
+        Function used by the simann library.
+        Makes the given move on the current board.
+        """
+        x, y, newy = move
+        K = self.K
+        d = self.N - 1
+
+        self.straight += (self.ys[newy] >= K) - (self.ys[y] > K)
+        self.diag += ((self.ds1[x + newy] >= K) - (self.ds1[x + y] > K)
+                      + (self.ds2[x - newy + d] >= K)
+                      - (self.ds2[x - y + d] > K))
+        self.ys[y] -= 1
+        self.ys[newy] += 1
+        self.ds1[x + y] -= 1
+        self.ds1[x + newy] += 1
+        self.ds2[x - y + d] -= 1
+        self.ds2[x - newy + d] += 1
+
+        self.board ^= self.bit(x, y) ^ self.bit(x, newy)
+
+    def undo(self, move):
+        """
+        Function used by the simann library.
+        Takes back the given move, the last one made.
+        """
+        x, y, newy = move
+        self.apply((x, newy, y))
+
+
+class VectorizedBoard(Board):
+
+    """
+    Board scoring its whole neighborhood at once with NumPy.
+    Every move of every egg is scored in one batch of array operations
+    over the line counts, rather than one scoreMove() call per move.
+    """
+
+    def __init__(self, M, N, K, eggs):
+        if np is None:
+            raise ValueError('Vectorized scoring requires NumPy')
+        super(VectorizedBoard, self).__init__(M, N, K, eggs)
+
+        self.rows = np.arange(N)
+        self.nbytes = (M * N + 7) // 8
+
+    def cells(self):
+        """
+        The board as an N x M array of booleans.
+        """
+        data = np.frombuffer(self.board.to_bytes(self.nbytes, 'little'),
+                             dtype=np.uint8)
+        bits = np.unpackbits(data, bitorder='little')[:self.M * self.N]
+        return bits.reshape(self.N, self.M).astype(bool)
+
+    def scoreMoves(self):
+        """
+        Function used by the simann library.
+        Scores every move of the neighborhood. Returns the array of
+        moves, one per row in the order of generateMoves(), the array
+        of their objective values and the index of the first best move.
+        """
+        K = self.K
+        d = self.N - 1
+        cells = self.cells()
+        ys = np.array(self.ys)
+        ds1 = np.array(self.ds1)
+        ds2 = np.array(self.ds2)
+
+        # The eggs ordered by column, then row, and their free rows
+        Y, X = np.nonzero(cells)
+        order = np.lexsort((Y, X))
+        Y, X = Y[order], X[order]
+        newY = self.rows[None, :]
+        free = ~cells[:, X].T
+
+        # Counts of the lines left and entered by every move
+        straight = (self.straight - (ys[Y] > K)[:, None]
+                    + (ys[newY] >= K))
+        diag = (self.diag
+                - (ds1[X + Y] > K)[:, None]
+                + (ds1[X[:, None] + newY] >= K)
+                - (ds2[X - Y + d] > K)[:, None]
+                + (ds2[X[:, None] - newY + d] >= K))
+        scores = -(straight * self.STRAIGHT_PENALTY +
+                   diag * self.DIAG_PENALTY)
+
+        egg, newy = np.nonzero(free)
+        moves = np.stack((X[egg], Y[egg], newy), axis=1)
+        scores = scores[egg, newy]
+        best = int(np.argmax(scores)) if len(moves) != 0 else None
+        return moves, scores, best
+
+    def apply(self, move):
+        """
+        Function used by the simann library.
+        Makes the given move, which may be a row of scoreMoves().
+        """
+        x, y, newy = move
+        super(VectorizedBoard, self).apply((int(x), int(y), int(newy)))
 
 
 class EggCarton(sa.SimulatedAnnealing):
@@ -124,21 +308,28 @@ class EggCarton(sa.SimulatedAnnealing):
     Egg Carton puzzle container
     """
 
-    def __init__(self, M, N, K):
+    def __init__(self, M, N, K, vectorized=False, cooling=None):
         super(EggCarton, self).__init__()
 
         self.M = M
         self.N = N
         self.K = K
 
+        # Score the neighborhood with NumPy, see VectorizedBoard
         maxEggs = max(M, N) * K
-        self.environment = Board(M, N, K, maxEggs)
+        if vectorized:
+            self.environment = VectorizedBoard(M, N, K, maxEggs)
+        else:
+            self.environment = Board(M, N, K, maxEggs)
 
         self.Tmax = 1.0
         self.Tmin = 1e-2
         self.dT = 1e-5
         self.streakLimit = 1
 
+        # Cooling schedule used instead of schedule(), see schedules.py
+        self.cooling = cooling
+
         self.name = self.__repr__()
 
     def __repr__(self):
@@ -146,7 +337,149 @@ class EggCarton(sa.SimulatedAnnealing):
 
     def schedule(self, temp):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Gives the new temperature when given one.
         """
         return temp - self.dT
+
+
+class EggCartonPopulation(object):
+
+    """
+    A population of EggCarton chains annealed in lockstep with NumPy.
+    The egg rows, line counts and temperatures of all chains are kept
+    in arrays, and one step proposes a random move in every chain and
+    accepts or rejects each by the Metropolis criterion with a handful
+    of array operations. Eggs never leave their column, so a chain is
+    given by the row of each of its eggs. The temperatures follow the
+    schedule of the EggCarton puzzle, from its Tmax, or from the
+    per-chain 'temperatures' if given.
+    """
+
+    def __init__(self, M, N, K, chains=256, temperatures=None, seed=None):
+        if np is None:
+            raise ValueError('Population annealing requires NumPy')
+
+        self.M = M
+        self.N = N
+        self.K = K
+        self.chains = chains
+        self.puzzle = EggCarton(M, N, K)
+        self.rng = np.random.default_rng(seed)
+
+        if temperatures is None:
+            self.T = np.full(chains, float(self.puzzle.Tmax))
+        else:
+            self.T = np.array(temperatures, dtype=float)
+            if self.T.shape != (chains,):
+                raise ValueError('Need one temperature per chain')
+
+        # Every chain starts from the initial board of the puzzle,
+        # self.X[e] is the column of egg e and self.Y[c, e] its row in
+        # chain c
+        board = self.puzzle.environment
+        eggs = board.getP()
+        cells = [(x, y) for y in range(N) for x in range(M)
+                 if eggs & board.bit(x, y)]
+        self.X = np.array([x for x, _ in cells])
+        self.Y = np.tile(np.array([y for _, y in cells]), (chains, 1))
+
+        self.occupied = np.zeros((chains, N, M), dtype=bool)
+        self.occupied[:, self.Y[0], self.X] = True
+        xs, ys, ds1, ds2 = board.countLines(eggs)
+        self.ys = np.tile(np.array(ys), (chains, 1))
+        self.ds1 = np.tile(np.array(ds1), (chains, 1))
+        self.ds2 = np.tile(np.array(ds2), (chains, 1))
+        self.straight = np.full(chains, board.straight)
+        self.diag = np.full(chains, board.diag)
+
+        # Best penalty and egg rows found by each chain
+        self.bestPenalty = self.penalty()
+        self.bestY = self.Y.copy()
+
+        self.iteration = 0
+        self.accepted = 0
+
+    def penalty(self):
+        return (self.straight * Board.STRAIGHT_PENALTY +
+                self.diag * Board.DIAG_PENALTY)
+
+    def step(self):
+        """
+        One Metropolis step of every chain: move a random egg to a
+        random other row of its column, if that cell is free.
+        """
+        K = self.K
+        d = self.N - 1
+        chain = np.arange(self.chains)
+
+        egg = self.rng.integers(len(self.X), size=self.chains)
+        x = self.X[egg]
+        y = self.Y[chain, egg]
+        newy = self.rng.integers(self.N - 1, size=self.chains)
+        newy += newy >= y
+
+        # Change of the excess counts of the lines left and entered
+        straight = ((self.ys[chain, newy] >= K).astype(int)
+                    - (self.ys[chain, y] > K))
+        diag = ((self.ds1[chain, x + newy] >= K).astype(int)
+                - (self.ds1[chain, x + y] > K)
+                + (self.ds2[chain, x - newy + d] >= K)
+                - (self.ds2[chain, x - y + d] > K))
+        delta = (straight * Board.STRAIGHT_PENALTY +
+                 diag * Board.DIAG_PENALTY)
+
+        # Metropolis criterion, on the penalty to be minimized
+        with np.errstate(over='ignore'):
+            chance = np.exp(-delta / self.T)
+        accept = ~self.occupied[chain, newy, x] & (
+            (delta <= 0) | (self.rng.random(self.chains) < chance))
+
+        a = np.flatnonzero(accept)
+        x, y, newy = x[a], y[a], newy[a]
+        self.ys[a, y] -= 1
+        self.ys[a, newy] += 1
+        self.ds1[a, x + y] -= 1
+        self.ds1[a, x + newy] += 1
+        self.ds2[a, x - y + d] -= 1
+        self.ds2[a, x - newy + d] += 1
+        self.occupied[a, y, x] = False
+        self.occupied[a, newy, x] = True
+        self.Y[a, egg[a]] = newy
+        self.straight[a] += straight[a]
+        self.diag[a] += diag[a]
+
+        # Keep the best state of every chain
+        penalty = self.penalty()
+        improved = np.flatnonzero(penalty < self.bestPenalty)
+        self.bestPenalty[improved] = penalty[improved]
+        self.bestY[improved] = self.Y[improved]
+
+        self.T = np.maximum(self.puzzle.schedule(self.T), self.puzzle.Tmin)
+        self.iteration += 1
+        self.accepted += len(a)
+
+    def run(self, verbose=True):
+        """
+        Step all chains until the temperatures have reached Tmin, or
+        some chain has found a valid solution. Returns the final score
+        and the board of the best chain, like SimulatedAnnealing.run().
+        """
+        Tmin = self.puzzle.Tmin
+        while (self.T > Tmin).any() and (self.bestPenalty > 0).all():
+            self.step()
+
+        # Build the board of the best chain
+        best = int(np.argmin(self.bestPenalty))
+        board = self.puzzle.environment
+        board.setP(sum(board.bit(int(x), int(y))
+                       for x, y in zip(self.X, self.bestY[best])))
+        FPmax = board.objective(final=True)
+
+        if verbose:
+            print("Finished in {} iterations of {} chains".format(
+                self.iteration, self.chains))
+            print(board)
+            print("Score:", FPmax)
+
+        return FPmax, board.getP()
@@ -1,15 +1,25 @@
+import argparse
 import random as rand
+import sys
+import time
+
 import colorama as cr
 
 import eggcarton as egg
+import schedules
+import simann as sa
 import switchboard as switch
+from telemetry import TelemetrySink
+
+# Sizes of the bundled puzzles
+EGG_SIZES = [(5, 5, 2), (6, 6, 2), (8, 8, 1), (10, 10, 3)]
+SWITCH_SIZES = [(4, 4, 3, 2, (3, 1), (0, 3)),
+                (6, 5, 3, 2, (5, 0), (0, 4)),
+                (8, 8, 3, 2, (7, 1), (0, 7))]
 
-eggPuzzles = [egg.EggCarton(5, 5, 2), egg.EggCarton(6, 6, 2),
-              egg.EggCarton(8, 8, 1), egg.EggCarton(10, 10, 3)]
+eggPuzzles = [egg.EggCarton(*size) for size in EGG_SIZES]
 
-switchPuzzles = [switch.Switchboard(4, 4, 3, 2, (3, 1), (0, 3)),
-                 switch.Switchboard(6, 5, 3, 2, (5, 0), (0, 4)),
-                 switch.Switchboard(8, 8, 3, 2, (7, 1), (0, 7))]
+switchPuzzles = [switch.Switchboard(*size) for size in SWITCH_SIZES]
 
 
 def main():
@@ -36,5 +46,171 @@ def main():
 
         input("Next\n")
 
+
+def main_headless(args):
+    cr.init(autoreset=True)
+
+    sizes = [(egg.EggCarton, size) for size in args.egg]
+    sizes += [(switch.Switchboard, size) for size in args.switch]
+    if len(sizes) == 0 or len(args.puzzles) != 0:
+        if 'switch' not in args.puzzles:
+            sizes += [(egg.EggCarton, size) for size in EGG_SIZES]
+        if 'egg' not in args.puzzles:
+            sizes += [(switch.Switchboard, size) for size in SWITCH_SIZES]
+
+    output = None
+    if args.telemetry == '-':
+        output = sys.stdout
+    elif args.telemetry is not None:
+        output = open(args.telemetry, 'w')
+    report = sys.stderr if output is sys.stdout else sys.stdout
+
+    try:
+        for Puzzle, size in sizes:
+            for cooling in args.cooling:
+                scores = []
+                valid = 0
+                iterations = 0
+                seconds = 0.0
+                for run in range(args.runs):
+                    # Seed before building the puzzle, so that every
+                    # schedule starts run r from the same initial state
+                    rand.seed(None if args.seed is None else args.seed + run)
+                    puzzle = Puzzle(*size)
+                    puzzle.mode = args.mode
+                    puzzle.sampleSize = args.sample_size
+                    puzzle.cooling = schedules.makeSchedule(
+                        cooling, puzzle, args.cooling_iterations,
+                        reheatAfter=args.reheat_after,
+                        patience=args.patience)
+                    if output is not None:
+                        puzzle.telemetry = TelemetrySink(output, args.every)
+
+                    start = time.perf_counter()
+                    FP, P = puzzle.run(verbose=args.verbose)
+                    seconds += time.perf_counter() - start
+                    iterations += puzzle.iteration
+                    valid += puzzle.environment.validSolution()
+                    if FP != float('inf'):
+                        scores.append(FP)
+
+                    if args.runs == 1:
+                        print("{} {} score {} in {} iterations, {:.3f}s"
+                              .format(puzzle, cooling, FP, puzzle.iteration,
+                                      seconds), file=report)
+
+                if args.runs > 1:
+                    mean = ('{:.3f}'.format(sum(scores) / len(scores))
+                            if scores else '-')
+                    print("{} {} valid {}/{}, mean score {}, mean {:.0f} "
+                          "iterations, {:.3f}s".format(
+                              puzzle, cooling, valid, args.runs, mean,
+                              iterations / args.runs, seconds), file=report)
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+
+
+def eggSize(string):
+    """
+    Parse the size of an EggCarton puzzle, 'M,N,K'.
+    """
+    try:
+        M, N, K = (int(value) for value in string.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected M,N,K, got {!r}'.format(string))
+    if min(M, N, K) < 1 or max(M, N) * K > M * N:
+        raise argparse.ArgumentTypeError(
+            'no {} x {} carton holds {} eggs per line'.format(M, N, K))
+    return M, N, K
+
+
+def switchSize(string):
+    """
+    Parse the size of a Switchboard puzzle, 'M,N,D,W,SX:SY,EX:EY' with
+    the wire going from (SX, SY) to (EX, EY).
+    """
+    try:
+        M, N, D, W, start, end = string.split(',')
+        M, N, D, W = int(M), int(N), int(D), int(W)
+        start = tuple(int(value) for value in start.split(':'))
+        end = tuple(int(value) for value in end.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected M,N,D,W,SX:SY,EX:EY, got {!r}'.format(string))
+    if min(M, N) < 1 or min(D, W) < 0:
+        raise argparse.ArgumentTypeError(
+            'bad board size or weights in {!r}'.format(string))
+    for coord in (start, end):
+        if (len(coord) != 2 or not 0 <= coord[0] < M or
+                not 0 <= coord[1] < N):
+            raise argparse.ArgumentTypeError(
+                '{} is not on a {} x {} board'.format(coord, M, N))
+    if start == end:
+        raise argparse.ArgumentTypeError('start and end are the same peg')
+    return M, N, D, W, start, end
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(
+        description='The annealing puzzles. Without a command they run '
+                    'in an interactive terminal session.')
+    commands = parser.add_subparsers(dest='command')
+
+    headless = commands.add_parser(
+        'headless', help='run the puzzles without a terminal UI',
+        description='Run the annealing puzzles without a terminal UI')
+    headless.add_argument('puzzles', nargs='*', metavar='{egg,switch}',
+                          help='bundled puzzles to run, default both')
+    headless.add_argument('--egg', type=eggSize, action='append',
+                          default=[], metavar='M,N,K',
+                          help='run an EggCarton of the given size')
+    headless.add_argument('--switch', type=switchSize, action='append',
+                          default=[], metavar='M,N,D,W,SX:SY,EX:EY',
+                          help='run a Switchboard from (SX, SY) to (EX, EY)')
+    headless.add_argument('-s', '--seed', type=int,
+                          help='seed of the random module, run r of every '
+                               'puzzle uses seed + r')
+    headless.add_argument('-r', '--runs', type=int, default=1,
+                          help='runs per puzzle and schedule, more than '
+                               'one prints their means')
+    headless.add_argument('-c', '--cooling', action='append',
+                          choices=schedules.SCHEDULES,
+                          help='cooling schedule, repeat to compare '
+                               'schedules, default the puzzle schedule')
+    headless.add_argument('--cooling-iterations', type=int, default=10000,
+                          help='iterations the schedules other than the '
+                               'default take to cool down')
+    headless.add_argument('--reheat-after', type=int,
+                          help='reheat after this many iterations without '
+                               'improvement')
+    headless.add_argument('--patience', type=int,
+                          help='stop after this many iterations without '
+                               'improvement')
+    headless.add_argument('-m', '--mode', choices=sa.MODES,
+                          default='exhaustive', help='search mode')
+    headless.add_argument('--sample-size', type=int, default=1,
+                          help='moves sampled per metropolis iteration')
+    headless.add_argument('-t', '--telemetry',
+                          help="JSON lines telemetry file, '-' for stdout")
+    headless.add_argument('-e', '--every', type=int, default=1000,
+                          help='iterations between telemetry samples')
+    headless.add_argument('-v', '--verbose', action='store_true',
+                          help='print the search as it runs')
+
+    args = parser.parse_args(argv)
+    if args.command == 'headless':
+        for name in args.puzzles:
+            if name not in ('egg', 'switch'):
+                headless.error('unknown puzzle {!r}'.format(name))
+        args.cooling = args.cooling or ['default']
+    return args
+
+
 if __name__ == '__main__':
-    main()
+    args = parseArgs()
+    if args.command == 'headless':
+        main_headless(args)
+    else:
+        main()
@@ -0,0 +1,212 @@
+import math as m
+import multiprocessing as mp
+import random as rand
+
+
+def seeds(seed, n):
+    """
+    Derive n worker seeds from 'seed', or from fresh randomness if
+    'seed' is None.
+    """
+    master = rand.Random(seed)
+    return [master.randrange(2**32) for _ in range(n)]
+
+
+def multiStart(factory, runs, processes=None, seed=None, verbose=True):
+    """
+    Run 'runs' independent annealing runs on a pool of 'processes'
+    worker processes, and keep the best. 'factory' is a picklable
+    callable building a fresh puzzle, e.g. a SimulatedAnnealing
+    subclass or a functools.partial of one. Every run seeds the random
+    module with its own seed, derived from 'seed', before building its
+    puzzle, so random initial states differ between the runs and a
+    given seed reproduces the same result. Returns the final score and
+    the state of the best run, like SimulatedAnnealing.run().
+    """
+    processes = processes or mp.cpu_count()
+    tasks = [(factory, runSeed) for runSeed in seeds(seed, runs)]
+
+    with mp.Pool(processes) as pool:
+        results = pool.map(_annealOnce, tasks)
+
+    # The best run by the objective value of its best state
+    best = max(range(runs), key=lambda k: results[k][0])
+    _, FPmax, Pmax, environment = results[best]
+
+    if verbose:
+        print("Best of {} runs, run {}".format(runs, best + 1))
+        print(environment)
+        print("Score:", FPmax)
+
+    return FPmax, Pmax
+
+
+def _annealOnce(task):
+    factory, runSeed = task
+    rand.seed(runSeed)
+    puzzle = factory()
+    FPmax, Pmax = puzzle.run(verbose=False)
+    # run() leaves the environment in the best state found
+    environment = puzzle.environment
+    return environment.objective(), FPmax, Pmax, environment
+
+
+def parallelTempering(factory, replicas=8, rounds=100, swapEvery=50,
+                      temperatures=None, processes=None, seed=None,
+                      verbose=True):
+    """
+    Parallel tempering. 'replicas' copies of the puzzle built by
+    'factory', see multiStart(), search at fixed temperatures, by
+    default spaced geometrically between the Tmin and Tmax of the
+    puzzle. In each of the 'rounds' rounds every replica makes
+    'swapEvery' iterations, in parallel on 'processes' worker
+    processes, after which replicas at neighboring temperatures swap
+    states by the Metropolis criterion. This lets good states found at
+    high temperatures descend to be refined at the low ones. The
+    search stops early once a replica has found a valid solution
+    streak as long as the streakLimit of the puzzle. Returns the final
+    score and the best state found, like SimulatedAnnealing.run().
+
+    The replicas search in the metropolis mode whatever the mode of
+    the puzzle, as a fixed temperature only samples the states by
+    their objective value under the Metropolis criterion that the
+    swaps assume. Every replica lives in the same worker for the whole
+    search. A swap exchanges the temperatures of two replicas rather
+    than their states, which is the same move, so a round only sends
+    the temperatures and seeds to the workers and gets the scores
+    back, and only the best state is sent back at the end.
+    """
+    processes = min(processes or mp.cpu_count(), replicas)
+    master = rand.Random(seed)
+    replicaSeeds = list(enumerate(seeds(master.randrange(2**32), replicas)))
+
+    workers = []
+    try:
+        for w in range(processes):
+            conn, child = mp.Pipe()
+            worker = mp.Process(target=_replicaWorker, args=(
+                child, factory, replicaSeeds[w::processes]))
+            worker.daemon = True
+            worker.start()
+            child.close()
+            workers.append((conn, worker))
+
+        # Replica k lives in worker k % processes, the workers reply
+        # with the temperature bounds and the scores of their replicas
+        bounds, scores = {}, {}
+        for conn, _ in workers:
+            for index, (Tmin, Tmax, FP, FPmax) in _receive(conn).items():
+                bounds[index] = Tmin, Tmax
+                scores[index] = FP, FPmax, False
+
+        if temperatures is None:
+            Tmin, Tmax = bounds[0]
+            if replicas == 1:
+                temperatures = [Tmin]
+            else:
+                ratio = (Tmax / Tmin) ** (1.0 / (replicas - 1))
+                temperatures = [Tmin * ratio ** k for k in range(replicas)]
+        temperatures = sorted(temperatures)
+        if len(temperatures) != replicas:
+            raise ValueError('Need one temperature per replica')
+
+        # The replica at each temperature
+        order = list(range(replicas))
+        swaps = 0
+        done = 0
+        for r in range(rounds):
+            done += 1
+            tasks = [[] for _ in workers]
+            for T, index in zip(temperatures, order):
+                tasks[index % processes].append(
+                    (index, T, swapEvery, master.randrange(2**32)))
+            for (conn, _), task in zip(workers, tasks):
+                conn.send(('anneal', task))
+            for conn, _ in workers:
+                scores.update(_receive(conn))
+
+            if any(finished for _, _, finished in scores.values()):
+                break
+
+            # Swap even and odd neighbor pairs in turn
+            for k in range(r % 2, replicas - 1, 2):
+                lower, upper = order[k], order[k+1]
+                delta = (scores[upper][0] - scores[lower][0]) * (
+                    1.0 / temperatures[k] - 1.0 / temperatures[k+1])
+                if delta >= 0 or master.random() < m.exp(delta):
+                    order[k], order[k+1] = upper, lower
+                    swaps += 1
+
+        best = max(range(replicas), key=lambda index: scores[index][1])
+        conn = workers[best % processes][0]
+        conn.send(('best', best))
+        FPmax, Pmax, environment = _receive(conn)
+    finally:
+        for conn, worker in workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            worker.join()
+
+    if verbose:
+        print("Parallel tempering, {} replicas, {} rounds, {} swaps".format(
+            replicas, done, swaps))
+        print(environment)
+        print("Score:", FPmax)
+
+    return FPmax, Pmax
+
+
+def _receive(conn):
+    reply = conn.recv()
+    if isinstance(reply, Exception):
+        raise reply
+    return reply
+
+
+def _replicaWorker(conn, factory, replicaSeeds):
+    """
+    Worker process of parallelTempering(), owning the replicas listed
+    in 'replicaSeeds' as (index, seed) pairs. It answers the requests
+    sent over 'conn' until it receives None.
+    """
+    try:
+        puzzles = {}
+        for index, replicaSeed in replicaSeeds:
+            rand.seed(replicaSeed)
+            puzzle = factory()
+            puzzle.mode = 'metropolis'
+            puzzle.reset()
+            puzzles[index] = puzzle
+        conn.send({index: (puzzle.Tmin, puzzle.Tmax, puzzle.FP, puzzle.FPmax)
+                   for index, puzzle in puzzles.items()})
+
+        for request in iter(conn.recv, None):
+            command, argument = request
+            if command == 'anneal':
+                scores = {}
+                for index, T, iterations, blockSeed in argument:
+                    puzzle = puzzles[index]
+                    _annealBlock(puzzle, T, iterations, blockSeed)
+                    scores[index] = (puzzle.FP, puzzle.FPmax,
+                                     puzzle.streak >= puzzle.streakLimit)
+                conn.send(scores)
+            elif command == 'best':
+                puzzle = puzzles[argument]
+                environment = puzzle.environment
+                environment.setP(puzzle.Pmax)
+                FPmax = environment.objective(final=True)
+                conn.send((FPmax, puzzle.Pmax, environment))
+    except Exception as e:
+        conn.send(e)
+    finally:
+        conn.close()
+
+
+def _annealBlock(puzzle, T, iterations, blockSeed):
+    rand.seed(blockSeed)
+    for _ in range(iterations):
+        puzzle.step(T)
+        if puzzle.streak >= puzzle.streakLimit:
+            break
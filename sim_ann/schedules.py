@@ -0,0 +1,206 @@
+import math as m
+
+
+class Schedule(object):
+
+    """
+    Cooling schedule base class.
+    reset() is called when a search starts and returns the starting
+    temperature. next() is called after every iteration, with whether
+    the iteration moved to a worse state and whether it improved on
+    the best state found, and returns the next temperature.
+
+    All schedules can reheat and stop early on a plateau. After
+    'reheatAfter' iterations without improvement, the temperature is
+    raised to 'reheatTo' times Tmax and the schedule starts over from
+    there, at most 'maxReheats' times. After 'patience' iterations
+    without improvement the schedule is done, and the search stops.
+    """
+
+    def __init__(self, reheatAfter=None, reheatTo=0.5, maxReheats=3,
+                 patience=None):
+        self.reheatAfter = reheatAfter
+        self.reheatTo = reheatTo
+        self.maxReheats = maxReheats
+        self.patience = patience
+
+        self.Tmax = None
+        self.Tmin = None
+        self.stale = 0
+        self.reheats = 0
+        self.done = False
+
+    def reset(self, Tmax, Tmin):
+        """
+        Start a new search. Returns the starting temperature.
+        """
+        self.Tmax = Tmax
+        self.Tmin = Tmin
+        self.stale = 0
+        self.reheats = 0
+        self.done = False
+        self.restart(Tmax)
+        return Tmax
+
+    def next(self, T, worse, improved):
+        """
+        Returns the temperature after an iteration at temperature T.
+        """
+        self.stale = 0 if improved else self.stale + 1
+        if self.patience is not None and self.stale >= self.patience:
+            self.done = True
+
+        if (self.reheatAfter is not None and self.stale != 0 and
+                self.stale % self.reheatAfter == 0 and
+                self.reheats < self.maxReheats):
+            self.reheats += 1
+            T = max(T, self.reheatTo * self.Tmax)
+            self.restart(T)
+            return T
+
+        return self.cool(T, worse)
+
+    def restart(self, T):
+        """
+        Start the schedule over from temperature T.
+        """
+        pass
+
+    def cool(self, T, worse):
+        """
+        The temperature after T. Must be implemented by the schedules.
+        """
+        raise NotImplementedError()
+
+
+class FunctionSchedule(Schedule):
+
+    """
+    Cooling by a function from a temperature to the next one, such as
+    the schedule() of a SimulatedAnnealing container.
+    """
+
+    def __init__(self, function, **kwargs):
+        super(FunctionSchedule, self).__init__(**kwargs)
+        self.function = function
+
+    def cool(self, T, worse):
+        return self.function(T)
+
+
+class LinearSchedule(Schedule):
+
+    """
+    Lower the temperature by 'dT' every iteration.
+    """
+
+    def __init__(self, dT, **kwargs):
+        super(LinearSchedule, self).__init__(**kwargs)
+        self.dT = dT
+
+    def cool(self, T, worse):
+        return T - self.dT
+
+
+class GeometricSchedule(Schedule):
+
+    """
+    Multiply the temperature by 'alpha' every iteration.
+    """
+
+    def __init__(self, alpha=0.99, **kwargs):
+        super(GeometricSchedule, self).__init__(**kwargs)
+        self.alpha = alpha
+
+    def cool(self, T, worse):
+        return T * self.alpha
+
+
+class LogarithmicSchedule(Schedule):
+
+    """
+    The temperature T0 * log(2) / log(c * k + 2) at iteration k after
+    starting at T0. With c = 1 this is the classic schedule of the
+    convergence proofs, which cools far too slowly to ever reach a
+    practical Tmin. Given 'iterations', c is chosen on every (re)start
+    so that the same curve reaches Tmin after that many iterations.
+    """
+
+    def __init__(self, iterations=None, **kwargs):
+        super(LogarithmicSchedule, self).__init__(**kwargs)
+        self.iterations = iterations
+        self.logScale = 0.0
+        self.T0 = None
+        self.k = 0
+
+    def restart(self, T):
+        self.T0 = T
+        self.k = 0
+        ratio = float(T) / self.Tmin
+        if self.iterations is not None and ratio > 1:
+            # log(c), where c * iterations + 2 == 2 ** ratio
+            self.logScale = (ratio * m.log(2) + m.log1p(-2.0 ** (1 - ratio))
+                             - m.log(self.iterations))
+
+    def cool(self, T, worse):
+        self.k += 1
+        # log(c * k + 2), without computing c, which may overflow
+        a, b = self.logScale + m.log(self.k), m.log(2)
+        a, b = max(a, b), min(a, b)
+        return self.T0 * m.log(2) / (a + m.log1p(m.exp(b - a)))
+
+
+class AdaptiveSchedule(Schedule):
+
+    """
+    Geometric cooling steered by the measured acceptance ratio, the
+    share of iterations moving to a worse state, averaged over about
+    'window' iterations. While the ratio is above 'target' the search
+    is still wandering and is cooled faster, up to alpha ** 4 per
+    iteration. Below it, cooling slows down, to alpha ** 0.1, so the
+    search gets time at the temperatures where it makes progress.
+    """
+
+    def __init__(self, target=0.2, alpha=0.99, window=100, **kwargs):
+        super(AdaptiveSchedule, self).__init__(**kwargs)
+        self.target = target
+        self.alpha = alpha
+        self.window = window
+        self.ratio = target
+
+    def restart(self, T):
+        self.ratio = self.target
+
+    def cool(self, T, worse):
+        self.ratio += (worse - self.ratio) / self.window
+        speed = min(max(self.ratio / self.target, 0.1), 4.0)
+        return T * self.alpha ** speed
+
+
+# Schedule names understood by makeSchedule()
+SCHEDULES = ('default', 'linear', 'geometric', 'logarithmic', 'adaptive')
+
+
+def makeSchedule(name, puzzle, iterations=10000, **kwargs):
+    """
+    The cooling schedule 'name', one of SCHEDULES, for the
+    SimulatedAnnealing container 'puzzle'. 'default' wraps the
+    schedule() of the puzzle. The other schedules are set up to cool
+    from the Tmax to the Tmin of the puzzle in about 'iterations'
+    iterations, the adaptive one when its acceptance ratio is on
+    target. The keyword arguments, such as
+    reheatAfter and patience, are passed on to the schedule.
+    """
+    Tmax, Tmin = puzzle.Tmax, puzzle.Tmin
+    alpha = (float(Tmin) / Tmax) ** (1.0 / iterations)
+    if name == 'default':
+        return FunctionSchedule(puzzle.schedule, **kwargs)
+    if name == 'linear':
+        return LinearSchedule(float(Tmax - Tmin) / iterations, **kwargs)
+    if name == 'geometric':
+        return GeometricSchedule(alpha, **kwargs)
+    if name == 'logarithmic':
+        return LogarithmicSchedule(iterations, **kwargs)
+    if name == 'adaptive':
+        return AdaptiveSchedule(alpha=alpha, **kwargs)
+    raise ValueError('Unknown schedule %r' % name)
@@ -1,12 +1,37 @@
 import colorama as cr
+import itertools as it
 import random as rand
 import math as m
 
+from schedules import FunctionSchedule
+
+# Search modes, see SimulatedAnnealing.step()
+MODES = ('exhaustive', 'metropolis')
+
 
 class SimulatedAnnealing(object):
 
     """
     Simaluted Annealing base class. Implements the algorithm.
+
+    The environment holds the current state, and provides getP(),
+    setP(), objective() and validSolution(). Its neighborhood is given
+    in one of two ways:
+
+    - generate() returns a list of neighboring states, each scored
+      with objective(state).
+    - generateMoves() lazily yields move descriptors, scored with
+      scoreMove(move) and made with apply(move). undo(move) takes
+      back the last move made. getP() must then return a copy of the
+      state, as the moves change it in place.
+
+    The second is used when available, as no state is copied for the
+    neighbors and the neighborhood is never kept in memory. Such an
+    environment may also score its whole neighborhood in one go, with
+    scoreMoves() returning a sequence of the moves, one of their
+    objective values and the index of the best move. The metropolis
+    mode draws its proposals with randomMove(), if available, which
+    returns a uniformly random move without generating the others.
     """
 
     def __init__(self):
@@ -17,6 +42,18 @@ class SimulatedAnnealing(object):
         self.Tmin = 1e-2
         self.streakLimit = 1000
 
+        # Cooling schedule, see schedules.py, used instead of
+        # schedule() when set
+        self.cooling = None
+
+        # Search mode, one of MODES, and the number of moves sampled
+        # per iteration in the metropolis mode
+        self.mode = 'exhaustive'
+        self.sampleSize = 1
+
+        # Telemetry sink sampling the runs, see telemetry.py
+        self.telemetry = None
+
     def accept(self, current, proposal, temp):
         """
         Accept algorithm. Standard.
@@ -31,6 +68,19 @@ class SimulatedAnnealing(object):
         prob = m.e ** (- (proposal - current) / temp)
         return rand.random() > prob
 
+    def metropolis(self, current, proposal, temp):
+        """
+        The Metropolis criterion: accept a better proposal, and a
+        worse one with probability e ** ((proposal - current) / temp).
+        """
+        if proposal >= current:
+            return True
+
+        if temp == 0.0:
+            return False
+
+        return rand.random() < m.e ** ((proposal - current) / temp)
+
     def schedule(self, temp):
         """
         Base function of the algorithm.
@@ -51,87 +101,270 @@ class SimulatedAnnealing(object):
         string += "  Iteration = {5}    \n"
         print(string.format(*stats))
 
-    def run(self):
+    def reset(self):
         """
-        Actual algorithm
+        Start a search from the current state of the environment.
         """
-        # Clear the screen
-        print(cr.ansi.clear_screen(), end="")
+        environment = self.environment
+        self.moving = hasattr(environment, 'generateMoves')
+        self.batched = hasattr(environment, 'scoreMoves')
 
-        # Initialize the algorithm
-        T = self.Tmax
-        P = self.environment.getP()
-        FP = self.environment.objective()
-        Pmax = P
-        FPmax = FP
-
-        # Search states
-        streak = 0
-        exploiting = 0
-        exploring = 0
-        iteration = 1
-
-        # While T is acceptable and a valid solution
-        # found streak hasn't been broken
-        while T > self.Tmin and streak < self.streakLimit:
-            print(cr.Cursor.POS(), end="")
-
-            # Generate neighborhood
-            neighbors = self.environment.generate()
-
-            # Reset local max
-            PnMax = None
-            FPnMax = -float('inf')
-
-            # Check each neighbor
+        # Current and best state found
+        self.FP = environment.objective()
+        self.Pmax = environment.getP()
+        self.FPmax = self.FP
+
+        # Search states. In the exhaustive mode an iteration is
+        # exploiting when accept() takes the best neighbor and
+        # exploring when a random neighbor is taken instead, in the
+        # metropolis mode an accepted move is exploiting when it is no
+        # worse and exploring otherwise. self.accepted counts the
+        # iterations where accept() or metropolis() returned True.
+        self.streak = 0
+        self.exploiting = 0
+        self.exploring = 0
+        self.accepted = 0
+        self.iteration = 1
+        self.valid = self.environment.validSolution(self.Pmax)
+
+    def step(self, T):
+        """
+        One iteration of the search at temperature T.
+        The 'exhaustive' mode scores the whole neighborhood, and the
+        'metropolis' mode only a sample of it, see exhaustiveStep()
+        and metropolisStep().
+        """
+        if self.mode == 'exhaustive':
+            self.exhaustiveStep(T)
+        elif self.mode == 'metropolis':
+            self.metropolisStep(T)
+        else:
+            raise ValueError('Unknown mode %r' % self.mode)
+
+    def exhaustiveStep(self, T):
+        """
+        Move to the best or to a random neighbor of the current state.
+        """
+        environment = self.environment
+        moving = self.moving
+        batched = self.batched
+        FP = self.FP
+
+        # Generate neighborhood
+        if batched:
+            neighbors, scores, best = environment.scoreMoves()
+        elif moving:
+            neighbors = environment.generateMoves()
+            score = environment.scoreMove
+        else:
+            neighbors = environment.generate()
+            score = environment.objective
+
+        # Reset local max
+        PnMax = None
+        FPnMax = -float('inf')
+
+        # Check each neighbor
+        if batched:
+            count = len(neighbors)
+            if count != 0:
+                PnMax = neighbors[best]
+                FPnMax = scores[best]
+        else:
+            count = 0
             for neighbor in neighbors:
-                FPn = self.environment.objective(neighbor)
+                count += 1
+                FPn = score(neighbor)
                 if FPn > FPnMax:
                     FPnMax = FPn
                     PnMax = neighbor
-                if FPn > FPmax:
-                    FPmax = FPn
-                    Pmax = neighbor
-                    streak = 0
-
-            # If accept, choose best neighbor
-            if self.accept(FP, FPnMax, T):
-                exploiting += 1
-                P = PnMax
-            # else choose random neighbor
+
+        # Without neighbors there is nowhere to move, stay put
+        if count == 0:
+            self.improved = self.worse = False
+            self.iteration += 1
+            if environment.validSolution(self.Pmax):
+                self.streak += 1
+            return
+
+        # The best neighbor is the best state so far
+        improved = FPnMax > self.FPmax
+        if improved:
+            self.FPmax = FPnMax
+            self.streak = 0
+
+        # If accept, choose best neighbor
+        if self.accept(FP, FPnMax, T):
+            self.accepted += 1
+            self.exploiting += 1
+            P = PnMax
+        # else choose random neighbor
+        else:
+            self.exploring += 1
+            index = rand.randrange(count)
+            if moving and not batched:
+                # Generate the moves again up to the chosen one
+                P = next(it.islice(
+                    environment.generateMoves(), index, None))
             else:
-                exploring += 1
-                P = rand.choice(neighbors)
+                P = neighbors[index]
 
-            # Evaluate next search state
-            self.environment.setP(P)
-            FP = self.environment.objective()
+        # Evaluate next search state
+        if moving:
+            if improved:
+                environment.apply(PnMax)
+                self.Pmax = environment.getP()
+                environment.undo(PnMax)
+            environment.apply(P)
+        else:
+            if improved:
+                self.Pmax = PnMax
+            environment.setP(P)
+        self.FP = environment.objective()
 
-            # Schedule next temperature
-            T = self.schedule(T)
+        # Note how the iteration went, for the cooling schedule
+        self.improved = improved
+        self.worse = self.FP < FP
 
-            # Print stats
-            self.printStats(
-                (T, FPmax, streak, exploring, exploiting, iteration))
+        # Update iteration
+        self.iteration += 1
+
+        # If a valid solution is found, update streak
+        if environment.validSolution(self.Pmax):
+            self.streak += 1
+
+    def metropolisStep(self, T):
+        """
+        Propose the best of 'sampleSize' random moves, and make it if
+        the Metropolis criterion accepts it. The cost of an iteration
+        does not depend on the size of the neighborhood, as long as the
+        environment has randomMove().
+        """
+        environment = self.environment
+        FP = self.FP
+
+        PnMax = None
+        FPnMax = -float('inf')
+        for _ in range(self.sampleSize):
+            neighbor = self.randomNeighbor()
+            if neighbor is None:
+                # No neighbor, the proposal stays at -inf and is
+                # rejected
+                break
+            if self.moving:
+                FPn = environment.scoreMove(neighbor)
+            else:
+                FPn = environment.objective(neighbor)
+            if FPn > FPnMax:
+                FPnMax = FPn
+                PnMax = neighbor
+
+        improved = False
+        if self.metropolis(FP, FPnMax, T):
+            self.accepted += 1
+            if FPnMax >= FP:
+                self.exploiting += 1
+            else:
+                self.exploring += 1
+
+            if self.moving:
+                environment.apply(PnMax)
+            else:
+                environment.setP(PnMax)
+            self.FP = FPnMax
+
+            # The new state is the best state so far
+            improved = FPnMax > self.FPmax
+            if improved:
+                self.FPmax = FPnMax
+                self.Pmax = environment.getP()
+                self.valid = environment.validSolution(self.Pmax)
+                self.streak = 0
+
+        # Note how the iteration went, for the cooling schedule
+        self.improved = improved
+        self.worse = self.FP < FP
+
+        # Update iteration
+        self.iteration += 1
 
-            # Update iteration
-            iteration += 1
+        # If a valid solution is found, update streak
+        if self.valid:
+            self.streak += 1
 
-            # If a valid solution is found, update streak
-            if self.environment.validSolution(Pmax):
-                streak += 1
+    def randomNeighbor(self):
+        """
+        A uniformly random neighbor of the current state, a move when
+        the environment has generateMoves(), or None if there is none.
+        """
+        environment = self.environment
+        if hasattr(environment, 'randomMove'):
+            return environment.randomMove()
+        if not self.moving:
+            neighbors = environment.generate()
+            return rand.choice(neighbors) if neighbors else None
+
+        count = sum(1 for _ in environment.generateMoves())
+        if count == 0:
+            return None
+        index = rand.randrange(count)
+        return next(it.islice(environment.generateMoves(), index, None))
+
+    def run(self, verbose=True):
+        """
+        Actual algorithm.
+        If 'verbose' is False the run is headless and nothing is
+        printed, which saves the terminal output of every iteration.
+        The telemetry sink, if any, is fed in both cases.
+        """
+        # Clear the screen
+        if verbose:
+            print(cr.ansi.clear_screen(), end="")
+
+        # Initialize the algorithm
+        environment = self.environment
+        cooling = self.cooling or FunctionSchedule(self.schedule)
+        T = cooling.reset(self.Tmax, self.Tmin)
+        self.reset()
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.start(self, T)
+
+        # While T is acceptable, a valid solution
+        # found streak hasn't been broken and
+        # the search has not reached a plateau
+        while (T > self.Tmin and self.streak < self.streakLimit and
+               not cooling.done):
+            # Search the neighborhood
+            self.step(T)
+
+            # Schedule next temperature
+            T = cooling.next(T, self.worse, self.improved)
+            if telemetry is not None:
+                telemetry.record(self, T)
+
+            # Print stats
+            if verbose:
+                print(cr.Cursor.POS(), end="")
+                self.printStats(
+                    (T, self.FPmax, self.streak, self.exploring,
+                     self.exploiting, self.iteration))
 
         # Done with search
-        # Clean the screen
-        print(cr.ansi.clear_screen() + cr.Cursor.POS(), end="")
         # Set the best state we found in our search
-        self.environment.setP(Pmax)
+        environment.setP(self.Pmax)
         # Calculate final score
-        FPmax = self.environment.objective(final=True)
-        # Print stats and best environment
-        print("Finished in {} iterations".format(iteration))
-        print(self.environment)
-        print("Score:", FPmax)
+        FPmax = environment.objective(final=True)
+        if telemetry is not None:
+            telemetry.finish(self, T, FPmax)
+
+        if verbose:
+            # Clean the screen
+            print(cr.ansi.clear_screen() + cr.Cursor.POS(), end="")
+            # Print stats and best environment
+            print("Finished in {} iterations".format(self.iteration))
+            print(environment)
+            print("Score:", FPmax)
 
         # Return score and state
-        return FPmax, Pmax
+        return FPmax, self.Pmax
@@ -9,8 +9,11 @@ LEFT = "←"
 DOWN = "↓"
 RIGHT = "→"
 
-# Set of possible moves
-MOVES = {UP, LEFT, DOWN, RIGHT}
+# Possible moves
+MOVES = (UP, LEFT, DOWN, RIGHT)
+
+# Coordinate change of each move
+STEP = {UP: (0, -1), LEFT: (-1, 0), DOWN: (0, 1), RIGHT: (1, 0)}
 
 # Dict of trailing wire, used in representation
 MOVE_CHAR = {UP:    '',
@@ -18,9 +21,9 @@ MOVE_CHAR = {UP:    '',
              DOWN:  '',
              RIGHT: '-'}
 
-# Returns set of moves excluding given move
-OTHER = {UP:   MOVES ^ UP,   LEFT:  MOVES ^ LEFT,
-         DOWN: MOVES ^ DOWN, RIGHT: MOVES ^ RIGHT}
+# Returns moves excluding given move
+OTHER = {move: tuple(other for other in MOVES if other != move)
+         for move in MOVES}
 
 
 class Board(object):
@@ -30,6 +33,9 @@ class Board(object):
     Represented as a list of coordinates of the eggs.
     """
 
+    # Draws made by randomMove() before it lists the moves instead
+    MAX_DRAWS = 1000
+
     def __init__(self, M, N, D, W, start, end):
         self.M = M
         self.N = N
@@ -40,8 +46,17 @@ class Board(object):
         self.end = end
 
         self.possible = {(x, y) for x in range(M) for y in range(N)}
-        self.moves = {coord: rand.choice(tuple(MOVES))
-                      for coord in self.possible}
+        self.corners = {(x, y) for x in [0, M-1] for y in [0, N-1]}
+        self.moves = {coord: rand.choice(MOVES)
+                      for coord in sorted(self.possible)}
+
+        # Cache of the wire of the current board, see walk(). The score
+        # is None when the board has changed since the last walk.
+        self.path = []
+        self.values = []
+        self.streaks = []
+        self.first = {}
+        self.score = None
 
     def __repr__(self):
         s = (" " * (self.M*2+2) + "\n") * (self.N+2)
@@ -77,25 +92,24 @@ class Board(object):
 
     def getP(self):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Sets new current state.
         """
-        return self.moves
+        return self.moves.copy()
 
     def setP(self, P):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Gets the current state.
         """
         self.moves = P
+        self.score = None
 
     def moveCoord(self, coord, move):
         """
         Move a given coordinate one unit with the given move
         """
-        rule = {UP: (0, -1), LEFT: (-1, 0),
-                DOWN: (0, 1), RIGHT: (1, 0)}
-        return tuple(map(sum, zip(coord, rule[move])))
+        return tuple(map(sum, zip(coord, STEP[move])))
 
     def validCoord(self, coord):
         """
@@ -111,19 +125,49 @@ class Board(object):
 
     def objective(self, moves=None, final=False):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Returns the objective value of the given board.
         If no board is given, return the objective value of the
         current board.
         Final gives the final score of the solution when
         simann algorithm has finished.
         """
+        if moves is None and not final:
+            self.refresh()
+            return self.score
+
         if moves is None:
             moves = self.moves
+        return self.normalize(self.walk(moves, final=final), final)
+
+    def normalize(self, value, final=False):
+        """
+        Turn the cost of a wire into an objective value.
+        """
+        if final:
+            return value
 
         # Optimistic optimal value
         OPT_VALUE = (self.MxN-1) * self.D + max(self.M, self.N) * self.W
+        return (OPT_VALUE - value) / OPT_VALUE
+
+    def refresh(self):
+        """
+        Walk the wire of the current board, if it has changed, and
+        cache its path and score.
+        """
+        if self.score is None:
+            self.score = self.normalize(self.walk(self.moves, record=True))
 
+    def walk(self, moves, j=0, final=False, record=False):
+        """
+        Walk the wire along 'moves' and return its cost.
+        The walk starts at step j of the cached path of the current
+        board, with the pegs before it taken as visited, so 'moves'
+        must agree with the current board up to there. With 'record'
+        the walk, which must then start at step 0, is cached as the
+        path of the current board.
+        """
         # Different penalize costs
         PENALIZE_OUTOFBOUNDS = 100
         PENALIZE_NOTVISITED = 100
@@ -131,21 +175,48 @@ class Board(object):
         PENALIZE_CROSSING = 60
 
         # Initialize
-        value = self.W
-        visited = set()
-        currCoord = self.start
+        if j == 0:
+            value = self.W
+            currCoord = self.start
+            streak = 0
+        else:
+            value = self.values[j]
+            currCoord = self.path[j]
+            streak = self.streaks[j]
         currDir = moves[currCoord]
-        streak = 0
+        longest = max(self.M, self.N)
+
+        if record:
+            self.path = []
+            self.values = []
+            self.streaks = []
+            self.first = {}
+
+        # self.first[coord] is the step of the cached path at
+        # coord, the pegs visited before step j are those at the
+        # earlier steps
+        first = self.first
+        visited = set()
+
+        def isVisited(coord):
+            return coord in visited or first.get(coord, j) < j
 
         # Break when hitting a peg we have already visited
-        while currCoord not in visited and currCoord != self.end:
+        while currCoord != self.end and not isVisited(currCoord):
+            if record:
+                first[currCoord] = len(self.path)
+                self.path.append(currCoord)
+                self.values.append(value)
+                self.streaks.append(streak)
+
             # Add current peg to visited
             visited.add(currCoord)
 
             # Move currCord in current direction
             # and check for validness
             # If not valid, then out of bounds, break
-            newCoord = self.moveCoord(currCoord, currDir)
+            dx, dy = STEP[currDir]
+            newCoord = (currCoord[0] + dx, currCoord[1] + dy)
             if not self.validCoord(newCoord):
                 value += PENALIZE_OUTOFBOUNDS
                 break
@@ -157,7 +228,7 @@ class Board(object):
             if newCoord != self.end and newDir != currDir:
                 value += self.W
                 if not final:
-                    value += (max(self.M, self.N) - streak) * 2
+                    value += (longest - streak) * 2
                     streak = 0
 
             # Update current state
@@ -165,38 +236,36 @@ class Board(object):
             currDir = newDir
 
         # Penalize crossing wires
-        if currCoord in visited:
+        if isVisited(currCoord):
             value += PENALIZE_CROSSING
 
         # Add wire length, excluding end peg
-        value += len(visited) * self.D
+        numVisited = j + len(visited)
+        value += numVisited * self.D
 
         # Penalize if not hit end peg
-        if currCoord != self.end:
+        finished = currCoord == self.end
+        if not finished:
             dist = self.manhattanDist(currCoord, self.end)
             value += PENALIZE_NOFINISH * dist
         # else add to visited set
         else:
-            visited.add(self.end)
+            numVisited += 1
 
-        # Penalize unvisited pegs
-        notVisited = self.possible ^ visited
-        if final and len(notVisited) != 0:
+        # Penalize unvisited pegs, ten times as much in the corners
+        notVisited = self.MxN - numVisited
+        if final and notVisited != 0:
             return float('inf')
-        for coord in notVisited:
-            if coord in [(x, y) for x in [0, self.M-1] for y in [0, self.N-1]]:
-                value += PENALIZE_NOTVISITED * 10
-            else:
-                value += PENALIZE_NOTVISITED
+        corners = sum(1 for coord in self.corners
+                      if not isVisited(coord)
+                      and not (finished and coord == self.end))
+        value += PENALIZE_NOTVISITED * (notVisited + 9 * corners)
 
-        if final:
-            return value
-        else:
-            return (OPT_VALUE - value) / OPT_VALUE
+        return value
 
     def validSolution(self, moves=None):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Checks if the given solution is a valid one.
         """
         if moves is None:
@@ -207,7 +276,7 @@ class Board(object):
 
     def generate(self):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Generates a neighborhood of states of the current
         state on the board.
         """
@@ -228,6 +297,81 @@ class Board(object):
 
         return out
 
+    def generateMoves(self):
+        """
+        Function used by the simann library.
+        Lazily generates the neighborhood of the current state as
+        moves (coord, move, newMove), turning the peg at coord from
+        move to newMove.
+        """
+        for y in range(self.N):
+            for x in range(self.M):
+                coord = (x, y)
+                if coord == self.end:
+                    continue
+
+                move = self.moves[coord]
+                for newMove in OTHER[move]:
+                    if self.validCoord(self.moveCoord(coord, newMove)):
+                        yield (coord, move, newMove)
+
+    def randomMove(self):
+        """
+        Function used by the simann library.
+        Returns a uniformly random move of the neighborhood, by drawing
+        pegs and moves until they make a move. After MAX_DRAWS misses
+        the move is picked from generateMoves() instead, and None is
+        returned if there is no move at all.
+        """
+        for _ in range(self.MAX_DRAWS):
+            coord = (rand.randrange(self.M), rand.randrange(self.N))
+            move = self.moves[coord]
+            newMove = rand.choice(OTHER[move])
+            if (coord != self.end and
+                    self.validCoord(self.moveCoord(coord, newMove))):
+                return (coord, move, newMove)
+
+        moves = list(self.generateMoves())
+        return rand.choice(moves) if moves else None
+
+    def scoreMove(self, move):
+        """
+        Function used by the simann library.
+        Returns the objective value of the current board after the
+        given move, without keeping it. Only the part of the wire from
+        the turned peg on is walked again, and nothing at all if the
+        wire never reaches the peg.
+        """
+        self.refresh()
+        coord, oldMove, newMove = move
+        k = self.first.get(coord)
+        if k is None:
+            return self.score
+
+        # The wire changes from the step entering the peg
+        self.moves[coord] = newMove
+        value = self.walk(self.moves, max(k - 1, 0))
+        self.moves[coord] = oldMove
+        return self.normalize(value)
+
+    def apply(self, move):
+        """
+        Function used by the simann library.
+        Makes the given move on the current board.
+        """
+        coord, _, newMove = move
+        self.moves[coord] = newMove
+        self.score = None
+
+    def undo(self, move):
+        """
+        Function used by the simann library.
+        Takes back the given move, the last one made.
+        """
+        coord, oldMove, _ = move
+        self.moves[coord] = oldMove
+        self.score = None
+
 
 class Switchboard(sa.SimulatedAnnealing):
 
@@ -235,7 +379,7 @@ class Switchboard(sa.SimulatedAnnealing):
     Switchboard puzzle container
     """
 
-    def __init__(self, M, N, D, W, start, end):
+    def __init__(self, M, N, D, W, start, end, cooling=None):
         super(Switchboard, self).__init__()
 
         self.M = M
@@ -250,6 +394,9 @@ class Switchboard(sa.SimulatedAnnealing):
         self.Tmin = 2e-2
         self.streakLimit = 1000
 
+        # Cooling schedule used instead of schedule(), see schedules.py
+        self.cooling = cooling
+
         self.name = self.__repr__()
 
     def __repr__(self):
@@ -259,7 +406,7 @@ class Switchboard(sa.SimulatedAnnealing):
 
     def schedule(self, temp):
         """
-        Function used by the simann bibliography.
+        Function used by the simann library.
         Gives the new temperature when given one.
         """
         if temp > 10.0:
@@ -0,0 +1,82 @@
+import json
+import time
+
+
+class TelemetrySink(object):
+
+    """
+    Samples annealing runs into a stream of JSON lines.
+    Attach the sink to a SimulatedAnnealing container as its telemetry,
+    and every 'every' iterations of its runs one line is written to the
+    file object 'output', with the temperature, the current and best
+    objective values, the shares of exploring and exploiting
+    iterations, see SimulatedAnnealing.reset(), and of iterations whose
+    proposal was accepted since the last sample, and the iterations per
+    second. A last line is written when a run finishes, with its final
+    score.
+    """
+
+    def __init__(self, output, every=1000):
+        self.output = output
+        self.every = every
+
+        # Counters at the last sample
+        self.started = None
+        self.lastTime = None
+        self.lastIteration = 0
+        self.lastExploring = 0
+        self.lastExploiting = 0
+        self.lastAccepted = 0
+
+    def start(self, sa, T):
+        """
+        A run of 'sa' starts at temperature T.
+        """
+        self.started = self.lastTime = time.perf_counter()
+        self.lastIteration = sa.iteration
+        self.lastExploring = sa.exploring
+        self.lastExploiting = sa.exploiting
+        self.lastAccepted = sa.accepted
+        self.write(sa, T, 'start')
+
+    def record(self, sa, T):
+        """
+        Called after every iteration, samples every 'every' iterations.
+        """
+        if sa.iteration % self.every == 0:
+            self.write(sa, T, 'sample')
+
+    def finish(self, sa, T, score):
+        """
+        The run of 'sa' finished, with final score 'score'.
+        """
+        self.write(sa, T, 'finish', score=score)
+
+    def write(self, sa, T, event, **extra):
+        now = time.perf_counter()
+        iterations = sa.iteration - self.lastIteration
+        exploring = sa.exploring - self.lastExploring
+        exploiting = sa.exploiting - self.lastExploiting
+        accepted = sa.accepted - self.lastAccepted
+        seconds = now - self.lastTime
+
+        line = {'event': event,
+                'puzzle': sa.name,
+                'iteration': sa.iteration,
+                'elapsed': now - self.started,
+                'T': T,
+                'objective': sa.FP,
+                'best': sa.FPmax,
+                'exploring': exploring / iterations if iterations else 0.0,
+                'exploiting': exploiting / iterations if iterations else 0.0,
+                'accepted': accepted / iterations if iterations else 0.0,
+                'iterations_per_sec': (iterations / seconds
+                                       if seconds > 0 else 0.0)}
+        line.update(extra)
+        self.output.write(json.dumps(line) + '\n')
+
+        self.lastTime = now
+        self.lastIteration = sa.iteration
+        self.lastExploring = sa.exploring
+        self.lastExploiting = sa.exploiting
+        self.lastAccepted = sa.accepted
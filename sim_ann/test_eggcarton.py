@@ -0,0 +1,241 @@
+import random
+
+import pytest
+
+import eggcarton as ec
+
+SIZES = [(4, 4, 1), (6, 5, 2), (8, 8, 2), (7, 9, 3)]
+
+
+def random_board(M, N, K, seed, cls=ec.Board):
+    rng = random.Random(seed)
+    board = cls(M, N, K, max(M, N) * K)
+    board.setP(rng.getrandbits(M * N))
+    return board
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('size', SIZES)
+def test_score_move_matches_objective(size, seed):
+    board = random_board(*size, seed)
+    for move in board.generateMoves():
+        x, y, newy = move
+        after = board.getP() ^ board.bit(x, y) ^ board.bit(x, newy)
+        assert board.scoreMove(move) == pytest.approx(board.objective(after))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('size', SIZES)
+def test_apply_keeps_counts(size, seed):
+    board = random_board(*size, seed)
+    rng = random.Random(seed)
+    for _ in range(50):
+        moves = list(board.generateMoves())
+        if not moves:
+            break
+        move = rng.choice(moves)
+        expected = board.scoreMove(move)
+        board.apply(move)
+        assert board.objective() == pytest.approx(expected)
+        assert board.objective() == pytest.approx(
+            board.objective(board.getP()))
+
+    before = board.getP(), board.objective()
+    move = next(board.generateMoves())
+    board.apply(move)
+    board.undo(move)
+    assert (board.getP(), board.objective()) == before
+
+
+def naive_objective(board):
+    """
+    The objective of 'board' counted cell by cell from its picture.
+    """
+    M, N, K = board.M, board.N, board.K
+    cells = [row.split() for row in repr(board).splitlines()]
+    eggs = {(x, y) for y in range(N) for x in range(M)
+            if cells[y][x] == 'X'}
+    lines = ([[(x, y) for y in range(N)] for x in range(M)] +
+             [[(x, y) for x in range(M)] for y in range(N)])
+    diagonals = ([[(x, s - x) for x in range(M) if 0 <= s - x < N]
+                  for s in range(M + N - 1)] +
+                 [[(x, x - s) for x in range(M) if 0 <= x - s < N]
+                  for s in range(-N + 1, M)])
+
+    def excess(lines):
+        return sum(max(sum(cell in eggs for cell in line) - K, 0)
+                   for line in lines)
+    return -(excess(lines) * board.STRAIGHT_PENALTY +
+             excess(diagonals) * board.DIAG_PENALTY)
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('size', SIZES)
+def test_bitboard_objective(size, seed):
+    board = random_board(*size, seed)
+    assert board.objective() == pytest.approx(naive_objective(board))
+    assert board.validSolution() == (naive_objective(board) == 0)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_generate_matches_moves(size):
+    board = random_board(*size, 0)
+    moves = list(board.generateMoves())
+    assert board.generate() == [
+        board.getP() ^ board.bit(x, y) ^ board.bit(x, newy)
+        for x, y, newy in moves]
+    # Every egg can move to every free row of its column
+    picture = [row.split() for row in repr(board).splitlines()]
+    expected = sum(column.count('X') * column.count('.')
+                   for column in zip(*picture))
+    assert len(moves) == len(set(moves)) == expected
+
+
+def test_popcount():
+    assert [ec.popcount(v) for v in (0, 1, 6, 255, 1 << 70)] == \
+        [0, 1, 2, 8, 1]
+
+
+needs_numpy = pytest.mark.skipif(ec.np is None,
+                                 reason='NumPy is not installed')
+
+
+@needs_numpy
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('size', SIZES)
+def test_score_moves_matches_score_move(size, seed):
+    board = random_board(*size, seed, cls=ec.VectorizedBoard)
+    moves, scores, best = board.scoreMoves()
+    expected = list(board.generateMoves())
+    assert [tuple(int(v) for v in move) for move in moves] == expected
+    assert list(scores) == pytest.approx(
+        [board.scoreMove(move) for move in expected])
+    assert best == list(scores).index(max(scores))
+
+
+@needs_numpy
+@pytest.mark.parametrize('size', SIZES)
+def test_vectorized_run_matches(size):
+    results = []
+    for vectorized in (False, True):
+        ec.rand.seed(1)
+        puzzle = ec.EggCarton(*size, vectorized=vectorized)
+        puzzle.streakLimit = 10
+        puzzle.dT = 1e-2
+        results.append(puzzle.run(verbose=False))
+    assert results[0][0] == pytest.approx(results[1][0])
+    assert results[0][1] == results[1][1]
+
+
+@pytest.mark.parametrize('cls', [
+    ec.Board, pytest.param(ec.VectorizedBoard, marks=needs_numpy)])
+@pytest.mark.parametrize('eggs', [0, 16])
+def test_empty_neighborhood(cls, eggs):
+    # Neither an empty nor a full board has a move
+    puzzle = ec.EggCarton(4, 4, 1)
+    puzzle.environment = cls(4, 4, 1, eggs)
+    puzzle.streakLimit = 5
+    puzzle.dT = 0.1
+    assert list(puzzle.environment.generateMoves()) == []
+    for mode in ('exhaustive', 'metropolis'):
+        puzzle.mode = mode
+        FPmax, P = puzzle.run(verbose=False)
+        assert P == (1 << eggs) - 1
+        assert puzzle.environment.getP() == P
+
+
+@pytest.mark.parametrize('draws', [ec.Board.MAX_DRAWS, 0])
+def test_random_move_is_uniform(draws):
+    board = random_board(4, 4, 1, 0)
+    board.MAX_DRAWS = draws
+    moves = list(board.generateMoves())
+    counts = dict.fromkeys(moves, 0)
+    ec.rand.seed(0)
+    for _ in range(200 * len(moves)):
+        counts[board.randomMove()] += 1
+    assert len(counts) == len(moves)
+    assert min(counts.values()) > 150 and max(counts.values()) < 250
+
+
+def test_random_move_without_moves():
+    assert ec.Board(4, 4, 1, 0).randomMove() is None
+
+
+@pytest.mark.parametrize('sampleSize', [1, 4])
+def test_metropolis_mode_solves(sampleSize):
+    ec.rand.seed(0)
+    puzzle = ec.EggCarton(5, 5, 1)
+    puzzle.mode = 'metropolis'
+    puzzle.sampleSize = sampleSize
+    FPmax, P = puzzle.run(verbose=False)
+    assert FPmax == 0
+    assert puzzle.environment.validSolution(P)
+
+
+def population_board(population, chain, Y=None):
+    """
+    The bitboard of 'chain' of the EggCartonPopulation 'population',
+    from its current egg rows or from the rows 'Y'.
+    """
+    Y = population.Y[chain] if Y is None else Y
+    board = population.puzzle.environment
+    return sum(board.bit(int(x), int(y)) for x, y in zip(population.X, Y))
+
+
+@needs_numpy
+@pytest.mark.parametrize('size', [(6, 6, 2), (7, 9, 3)])
+def test_population_counts(size):
+    population = ec.EggCartonPopulation(*size, chains=16, seed=1)
+    board = population.puzzle.environment
+    columns = board.countLines(board.getP())[0]
+    for _ in range(20):
+        for _ in range(25):
+            population.step()
+        penalty = population.penalty()
+        for chain in range(population.chains):
+            eggs = population_board(population, chain)
+            xs, ys, ds1, ds2 = board.countLines(eggs)
+            assert xs == columns
+            assert list(population.ys[chain]) == ys
+            assert list(population.ds1[chain]) == ds1
+            assert list(population.ds2[chain]) == ds2
+            assert penalty[chain] == pytest.approx(
+                board.objective(eggs, final=True))
+            assert population.occupied[chain].sum() == len(population.X)
+
+            best = population_board(population, chain,
+                                    population.bestY[chain])
+            assert population.bestPenalty[chain] == pytest.approx(
+                board.objective(best, final=True))
+            assert population.bestPenalty[chain] <= penalty[chain]
+
+
+@needs_numpy
+def test_population_seed_reproduces():
+    results = []
+    for _ in range(2):
+        population = ec.EggCartonPopulation(6, 6, 2, chains=8, seed=7)
+        for _ in range(200):
+            population.step()
+        results.append((population.Y.tolist(), population.T.tolist(),
+                        population.accepted))
+    assert results[0] == results[1]
+
+
+@needs_numpy
+def test_population_solves():
+    population = ec.EggCartonPopulation(6, 6, 2, chains=64, seed=0)
+    FPmax, P = population.run(verbose=False)
+    assert FPmax == 0
+    board = ec.Board(6, 6, 2, 12)
+    board.setP(P)
+    assert board.validSolution()
+
+
+@needs_numpy
+def test_population_temperatures():
+    population = ec.EggCartonPopulation(4, 4, 1, chains=3,
+                                        temperatures=[0.1, 0.5, 1.0])
+    assert list(population.T) == [0.1, 0.5, 1.0]
+    with pytest.raises(ValueError):
+        ec.EggCartonPopulation(4, 4, 1, chains=3, temperatures=[1.0])
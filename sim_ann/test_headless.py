@@ -0,0 +1,105 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+import switchboard as sb
+from telemetry import TelemetrySink
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def headless(*argv):
+    return subprocess.run(
+        [sys.executable, os.path.join(HERE, 'main.py'), 'headless'] +
+        list(argv), cwd=HERE, capture_output=True, text=True, check=True)
+
+
+@pytest.mark.parametrize('mode', ['exhaustive', 'metropolis'])
+def test_telemetry_stream(mode):
+    output = io.StringIO()
+    sb.rand.seed(0)
+    puzzle = sb.Switchboard(4, 4, 3, 2, (3, 1), (0, 3))
+    puzzle.mode = mode
+    puzzle.telemetry = TelemetrySink(output, every=100)
+
+    # Count the accepted proposals independently of the container
+    accepted = []
+    for name in ('accept', 'metropolis'):
+        def counted(*args, rule=getattr(puzzle, name)):
+            result = rule(*args)
+            accepted.append(result)
+            return result
+        setattr(puzzle, name, counted)
+    FPmax, _ = puzzle.run(verbose=False)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    events = [line['event'] for line in lines]
+    assert events[0] == 'start' and events[-1] == 'finish'
+    assert set(events[1:-1]) <= {'sample'}
+    assert lines[-1]['score'] == FPmax
+    assert lines[-1]['iteration'] == puzzle.iteration
+
+    samples = lines[1:-1]
+    assert len(samples) == (puzzle.iteration - 1) // 100
+    for line in samples:
+        assert line['iteration'] % 100 == 0
+        assert 0 <= line['accepted'] <= 1
+    best = [line['best'] for line in lines]
+    assert best == sorted(best)
+
+    # The shares of every line add up to the accepted proposals
+    total = 0.0
+    previous = lines[0]['iteration']
+    for line in lines[1:]:
+        total += line['accepted'] * (line['iteration'] - previous)
+        previous = line['iteration']
+    assert round(total) == sum(accepted)
+    assert 0 < sum(accepted) < len(accepted)
+
+
+def test_parse_args():
+    args = main.parseArgs(['headless', 'egg', '--egg', '4,4,1',
+                           '--switch', '3,3,3,2,0:0,2:2', '-s', '1'])
+    assert args.command == 'headless'
+    assert args.puzzles == ['egg']
+    assert args.egg == [(4, 4, 1)]
+    assert args.switch == [(3, 3, 3, 2, (0, 0), (2, 2))]
+    assert args.cooling == ['default']
+    assert main.parseArgs([]).command is None
+
+
+@pytest.mark.parametrize('argv', [
+    ['--egg', '4,4'], ['--egg', '2,2,3'], ['--egg', '0,4,1'],
+    ['--switch', '3,3,3,2,0:0'], ['--switch', '3,3,3,2,0:0,3:3'],
+    ['--switch', '3,3,3,2,1:1,1:1'], ['--switch', '3,3,-1,2,0:0,2:2'],
+    ['chess'], ['-c', 'cubic']])
+def test_parse_args_errors(argv):
+    with pytest.raises(SystemExit):
+        main.parseArgs(['headless'] + argv)
+
+
+def test_headless_telemetry_on_stdout():
+    process = headless('--egg', '5,5,1', '-s', '0', '-t', '-', '-e', '50')
+    lines = [json.loads(line) for line in process.stdout.splitlines()]
+    assert lines[0]['event'] == 'start'
+    assert lines[-1]['event'] == 'finish'
+    assert lines[-1]['puzzle'] == 'EggCarton(5, 5, 1)'
+    assert 'EggCarton(5, 5, 1) default score' in process.stderr
+
+
+def test_headless_runs_are_reproducible():
+    argv = ('--egg', '5,5,1', '--switch', '3,3,3,2,0:0,2:2', '-s', '3',
+            '-r', '2', '-c', 'default', '-c', 'adaptive')
+    first, second = headless(*argv), headless(*argv)
+    lines = first.stdout.splitlines()
+    assert len(lines) == 4
+    assert all(' valid ' in line and '/2, mean score' in line
+               for line in lines)
+    # The timings differ, everything else is the same
+    assert ([line.rsplit(',', 1)[0] for line in lines] ==
+            [line.rsplit(',', 1)[0] for line in second.stdout.splitlines()])
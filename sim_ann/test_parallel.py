@@ -0,0 +1,53 @@
+import functools
+
+import pytest
+
+import eggcarton as ec
+import parallel
+import switchboard as sb
+
+EGG = functools.partial(ec.EggCarton, 6, 6, 2)
+SWITCH = functools.partial(sb.Switchboard, 4, 4, 3, 2, (3, 1), (0, 3))
+
+
+def test_seeds():
+    assert parallel.seeds(1, 4) == parallel.seeds(1, 4)
+    assert len(set(parallel.seeds(1, 4))) == 4
+
+
+@pytest.mark.parametrize('factory', [EGG, SWITCH])
+def test_multi_start_ignores_process_count(factory):
+    results = [parallel.multiStart(factory, runs=4, processes=processes,
+                                   seed=2, verbose=False)
+               for processes in (1, 3)]
+    assert results[0] == results[1]
+    FPmax, P = results[0]
+    environment = factory().environment
+    environment.setP(P)
+    assert environment.objective(final=True) == FPmax
+
+
+@pytest.mark.parametrize('factory', [EGG, SWITCH])
+def test_tempering_ignores_process_count(factory):
+    results = [parallel.parallelTempering(
+        factory, replicas=4, rounds=20, swapEvery=20,
+        processes=processes, seed=5, verbose=False)
+        for processes in (1, 2, 4)]
+    assert results[0] == results[1] == results[2]
+    FPmax, P = results[0]
+    environment = factory().environment
+    environment.setP(P)
+    assert environment.objective(final=True) == FPmax
+
+
+def test_tempering_solves():
+    FPmax, P = parallel.parallelTempering(EGG, replicas=4, rounds=200,
+                                          processes=2, seed=0,
+                                          verbose=False)
+    assert FPmax == 0
+
+
+def test_tempering_checks_temperatures():
+    with pytest.raises(ValueError):
+        parallel.parallelTempering(EGG, replicas=3, temperatures=[1, 2],
+                                   processes=2, verbose=False)
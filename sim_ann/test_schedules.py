@@ -0,0 +1,70 @@
+import pytest
+
+import eggcarton as ec
+import schedules
+import switchboard as sb
+
+
+def cool_down(schedule, Tmax=1.0, Tmin=1e-2, limit=10 ** 6, every=0):
+    """
+    Drive 'schedule' without improvements until it reaches Tmin or is
+    done, moving to a worse state every 'every' iterations if given.
+    Returns the temperatures.
+    """
+    T = schedule.reset(Tmax, Tmin)
+    temperatures = [T]
+    while T > Tmin and not schedule.done and len(temperatures) < limit:
+        worse = every != 0 and len(temperatures) % every == 0
+        T = schedule.next(T, worse, False)
+        temperatures.append(T)
+    return temperatures
+
+
+@pytest.mark.parametrize('puzzle', [ec.EggCarton(4, 4, 1),
+                                    sb.Switchboard(3, 3, 3, 2, (0, 0),
+                                                   (2, 2))])
+@pytest.mark.parametrize('name', ['linear', 'geometric', 'logarithmic',
+                                  'adaptive'])
+def test_schedule_takes_its_iterations(name, puzzle):
+    schedule = schedules.makeSchedule(name, puzzle, iterations=500)
+    # The adaptive schedule keeps its pace while a fifth of the
+    # iterations, its target, move to a worse state
+    temperatures = cool_down(schedule, puzzle.Tmax, puzzle.Tmin,
+                             every=5)
+    assert abs(len(temperatures) - 501) <= 5
+    assert temperatures == sorted(temperatures, reverse=True)
+
+
+@pytest.mark.parametrize('name', schedules.SCHEDULES)
+def test_reheating(name):
+    puzzle = sb.Switchboard(3, 3, 3, 2, (0, 0), (2, 2))
+    schedule = schedules.makeSchedule(name, puzzle, iterations=1000,
+                                      reheatAfter=100, patience=1000)
+    temperatures = cool_down(schedule, puzzle.Tmax, puzzle.Tmin)
+    assert schedule.done
+    assert len(temperatures) == 1001
+    assert schedule.reheats == schedule.maxReheats
+    # Each reheat raises the temperature to half of Tmax at least
+    for k in range(1, schedule.maxReheats + 1):
+        assert temperatures[100 * k] >= 0.5 * puzzle.Tmax
+
+
+def test_unknown_schedule():
+    with pytest.raises(ValueError):
+        schedules.makeSchedule('cubic', ec.EggCarton(4, 4, 1))
+
+
+def test_puzzle_uses_cooling():
+    ec.rand.seed(0)
+    puzzle = ec.EggCarton(6, 6, 2)
+    puzzle.cooling = schedules.makeSchedule('geometric', puzzle,
+                                            iterations=200)
+    puzzle.streakLimit = 10 ** 6
+    puzzle.run(verbose=False)
+    assert abs(puzzle.iteration - 201) <= 2
+
+    cooling = schedules.makeSchedule('default', puzzle, patience=50)
+    puzzle = ec.EggCarton(6, 6, 2, cooling=cooling)
+    puzzle.streakLimit = 10 ** 6
+    puzzle.run(verbose=False)
+    assert cooling.done
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+import switchboard as sb
+
+SIZES = [(3, 3, 3, 2, (0, 0), (2, 2)),
+         (6, 5, 3, 2, (5, 0), (0, 4)),
+         (7, 7, 1, 5, (3, 3), (0, 0))]
+
+
+def random_board(M, N, D, W, start, end, seed):
+    sb.rand.seed(seed)
+    return sb.Board(M, N, D, W, start, end)
+
+
+def with_move(board, move):
+    coord, _, newMove = move
+    moves = board.getP()
+    moves[coord] = newMove
+    return moves
+
+
+def snake(M, N):
+    """
+    The moves of a wire snaking through every row of an M x N board,
+    from (0, 0) to (M - 1, N - 1) for an odd N.
+    """
+    moves = {}
+    for y in range(N):
+        for x in range(M):
+            last = x == (M - 1 if y % 2 == 0 else 0)
+            if last:
+                moves[(x, y)] = sb.DOWN
+            else:
+                moves[(x, y)] = sb.RIGHT if y % 2 == 0 else sb.LEFT
+    return moves
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('size', SIZES)
+def test_score_move_matches_objective(size, seed):
+    board = random_board(*size, seed)
+    before = board.getP()
+    for move in board.generateMoves():
+        expected = board.objective(with_move(board, move))
+        assert board.scoreMove(move) == pytest.approx(expected)
+    assert board.getP() == before
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('size', SIZES)
+def test_cached_path_follows_moves(size, seed):
+    board = random_board(*size, seed)
+    rng = random.Random(seed)
+    for _ in range(100):
+        move = rng.choice(list(board.generateMoves()))
+        expected = board.scoreMove(move)
+        board.apply(move)
+        assert board.objective() == pytest.approx(expected)
+        assert board.objective() == pytest.approx(
+            board.objective(board.getP()))
+        if rng.random() < 0.2:
+            board.undo(move)
+            board.setP(board.getP())
+    # The cached path is the wire walked from the start
+    board.refresh()
+    assert board.path[0] == board.start
+    for k, coord in enumerate(board.path):
+        assert board.first[coord] == k
+
+
+def test_snake_is_valid():
+    board = random_board(5, 5, 3, 2, (0, 0), (4, 4), 0)
+    board.setP(snake(5, 5))
+    assert board.validSolution()
+    # 24 wire segments of length D, and a winding at each of the 8
+    # turns plus one at the start
+    assert board.objective(final=True) == 24 * 3 + 9 * 2
+    assert board.objective() == board.objective(board.getP())
+
+
+@pytest.mark.parametrize('draws', [sb.Board.MAX_DRAWS, 0])
+def test_random_move_is_uniform(draws):
+    board = random_board(*SIZES[0], 0)
+    board.MAX_DRAWS = draws
+    moves = list(board.generateMoves())
+    counts = dict.fromkeys(moves, 0)
+    for _ in range(200 * len(moves)):
+        counts[board.randomMove()] += 1
+    assert len(counts) == len(moves)
+    assert min(counts.values()) > 150 and max(counts.values()) < 250
+
+
+def test_metropolis_mode_solves():
+    sb.rand.seed(0)
+    puzzle = sb.Switchboard(*SIZES[0])
+    puzzle.mode = 'metropolis'
+    FPmax, P = puzzle.run(verbose=False)
+    assert puzzle.environment.validSolution(P)
+    assert FPmax < float('inf')